@@ -3,19 +3,37 @@
 """Numerical diff for text files.
 """
 
-import codecs
+import collections
+import contextlib
 import difflib
 import fnmatch
+import io
+import itertools
 # Standard libraries.
 import os
 import os.path
 import re
 import sys
+import time
 from argparse import ArgumentParser
 
-from .cmpline import CmpLine
+from .align import ALGORITHMS, anchors, getopcodes
+from .cmpline import CmpLine, Comparator, rows_equal
+from .deviation import Deviation
 from .difflist import DiffList
-from .files import Directory, RegularFile, fileFactory
+from .files import (
+    CompressedFile,
+    Directory,
+    RegularFile,
+    counterpart,
+    samecontent,
+    scantree,
+)
+from .reader import PREFETCH, MappedFile
+from . import server
+from .report import REPORTS, CollectReport, Result, TextReport
+from .stats import STATS
+from .stream import StreamDiff
 
 __date__ = "2022/04/30 19:07:44 hoel"
 __author__ = "Berthold Höllmann"
@@ -25,7 +43,7 @@ __maintainer__ = "Berthold Höllmann"
 __email__ = "berthold.hoellmann@dnvgl.com"
 
 
-__all__ = ["main"]
+__all__ = ["main", "compare_files", "compare_trees"]
 
 
 class NumDiffError(SystemExit):
@@ -49,14 +67,41 @@ def context_diff(
     r"""
     Modified context_diff taken from standard Python difflib.
 
-    This version takes"""
-    from difflib import SequenceMatcher, _format_range_context
+    This version takes the opcodes in `sequence`, a `DiffList` or a
+    list of opcodes."""
+    if isinstance(sequence, DiffList):
+        groups = sequence.grouped(n)
+    else:
+        from difflib import SequenceMatcher
+
+        seq = SequenceMatcher(None, [], [])
+        seq.opcodes = list(sequence)
+        groups = seq.get_grouped_opcodes(n)
+    return context_hunks(
+        groups,
+        a,
+        b,
+        fromfile=fromfile,
+        tofile=tofile,
+        fromfiledate=fromfiledate,
+        tofiledate=tofiledate,
+        lineterm=lineterm,
+    )
+
+
+def context_hunks(
+    groups, a, b, fromfile="", tofile="", fromfiledate="", tofiledate="", lineterm="\n"
+):
+    """Generate the lines of a context diff from grouped opcodes as
+    returned by `difflib.SequenceMatcher.get_grouped_opcodes`.
+
+    `a` and `b` only have to provide the lines used by the groups
+    seen so far when sliced."""
+    from difflib import _format_range_context
 
     prefix = dict(insert="+ ", delete="- ", replace="! ", equal="  ")
     started = False
-    seq = SequenceMatcher(None, [], [])
-    seq.opcodes = sequence
-    for group in seq.get_grouped_opcodes(n):
+    for group in groups:
         if not started:
             started = True
             fromdate = "\t{}".format(fromfiledate) if fromfiledate else ""
@@ -112,6 +157,26 @@ class CFile(object):
 class Main:
     """Main program. Used when called on command line."""
 
+    # Minimal number of lines in a `replace` block to try vectorized
+    # comparison on.
+    MINBLOCK = 16
+
+    # Estimated number of token comparisons per line allowed when
+    # re-matching a `replace` block in chunks, and the smallest chunk
+    # used.
+    LINECOST = 120
+    MINCHUNK = 4
+    # Number of lines sampled for estimating the cost.
+    CHUNKSAMPLE = 500
+
+    # Smallest segment of a file aligned by a process pool worker with
+    # `--jobs`.
+    SEGMENTLINES = 5000
+
+    # Number of line pairs checked in one vectorized step when only
+    # the verdict is needed.
+    ROWBLOCK = 1024
+
     DOC = """\
 Compare two text files with taking into account numerical errors.
 """
@@ -120,12 +185,51 @@ Compare two text files with taking into account numerical errors.
         self.options = None
         self.args = None
         self.optdict = {}
-        self.exclude = lambda x: None
-        self.ignore_matching_lines = lambda x: None
+        self._comparator = None
+        self.exclude = _nomatch
+        self.ignore_matching_lines = _nomatch
         self.differ = None
+        self.identical = 0
+        self.cache = None
+        self.algorithm = "difflib"
+        self.jobs = 1
+        # `CmpLine` objects by line index of both files, kept while
+        # aligning for computing the deviations.
+        self.parsed = None
+        self.report = TextReport()
+        # Keep process pools and cache connections for following runs,
+        # as the server does.
+        self.persistent = False
+
+    def __call__(self, argv=None):
+        self.parse_cmdline(argv)
+        self.setup(REPORTS[self.args.format](self.args.brief, self.args.summary))
+        self.report.start()
+        if self.args.recursive:
+            result = self.deepcheck(self.args.from_file, self.args.to_file)
+        else:
+            file1 = self.args.from_file
+            if os.path.isdir(self.args.to_file):
+                file2 = os.path.join(
+                    self.args.to_file, os.path.split(self.args.from_file)[-1]
+                )
+                if not os.path.exists(file2):
+                    file2 = counterpart(file2)
+            else:
+                file2 = self.args.to_file
+            self.report.comparing(file1, file2)
+            result = self.docheck(file1, file2)
+        self.report.finish()
+        if self.args.stats:
+            STATS.write(sys.stderr, self.identical)
+        if result:
+            return 1
+        else:
+            return 0
 
-    def __call__(self):
-        self.parse_cmdline()
+    def setup(self, report):
+        """Prepare comparing with the parsed arguments, reporting to
+        `report`."""
         self.optdict.update(
             dict(
                 cchars=self.args.comment_char,
@@ -141,65 +245,101 @@ Compare two text files with taking into account numerical errors.
         )
         if self.args.matlab:
             self.optdict["ignore_space"] = True
-        if self.args.recursive:
-            result = self.deepcheck(self.args.from_file, self.args.to_file)
-        else:
-            file1 = self.args.from_file
-            if os.path.isdir(self.args.to_file):
-                file2 = os.path.join(
-                    self.args.to_file, os.path.split(self.args.from_file)[-1]
-                )
+        self._comparator = Comparator(self.optdict)
+        self.algorithm = self.args.algorithm
+        self.jobs = self.args.jobs
+        if self.args.cache:
+            from .cache import ResultCache
+
+            if self.persistent:
+                self.cache = ResultCache.shared(self.args.cache, self.args.cache_size)
             else:
-                file2 = self.args.to_file
-            print("comparing '%s' and '%s'" % (file1, file2))
-            result = self.docheck(file1, file2)
-        if result:
-            return 1
+                self.cache = ResultCache(self.args.cache, self.args.cache_size)
+        STATS.clear()
+        if self.args.stats:
+            STATS.enable()
         else:
-            return 0
+            STATS.disable()
+        self.report = report
 
-    def docheck(self, file1, file2):
-        """Initiate comparing of two files."""
-        lines1 = [
-            i.strip()
-            for i in CFile(
-                codecs.open(file1, "r", encoding="utf-8", errors="replace"),
-                self.iscomment,
-                self.args.ignore_space_change or self.args.matlab,
-            )
-        ]
-        lines2 = [
-            i.strip()
-            for i in CFile(
-                codecs.open(file2, "r", encoding="utf-8", errors="replace"),
-                self.iscomment,
-                self.args.ignore_space_change or self.args.matlab,
-            )
-        ]
+    @property
+    def comparator(self):
+        """`Comparator` for the comparison options (property)"""
+        if self._comparator is None:
+            self._comparator = Comparator(self.optdict)
+        return self._comparator
 
+    def readlines(self, fname):
+        """Return an iterator over the stripped lines of file `fname`
+        taking part in the comparison."""
+        lines = MappedFile(
+            fname,
+            self.optdict.get("cchars"),
+            "|".join(self.args.ignore_matching_lines),
+            self.args.ignore_space_change or self.args.matlab,
+        )
         if self.optdict["mlab"]:
-            lines1[:6] = [""] * 6
-            lines2[:6] = [""] * 6
+            return itertools.chain([""] * 6, itertools.islice(lines, 6, None))
+        return lines
 
-        my_answer = DiffList(maxchunk=10)
-        if self.args.verbose:
-            print("difflib.SequenceMatcher(None, lines1, lines2).get_opcodes()")
-            print(difflib.SequenceMatcher(None, lines1, lines2).get_opcodes())
-        for (tag, ai, aj, bi, bj) in difflib.SequenceMatcher(
-            None, lines1, lines2
-        ).get_opcodes():
-            if tag in ("delete", "insert", "equal"):
-                my_answer.append((tag, ai, aj, bi, bj))
-            else:
-                for (_, AI, AJ, BI, BJ) in DiffList.prepres(tag, ai, aj, bi, bj, 20):
-                    a = [CmpLine(i, self.optdict) for i in lines1[AI:AJ]]
-                    b = [CmpLine(i, self.optdict) for i in lines2[BI:BJ]]
-                    my_answer.extend(
-                        [
-                            (i[0], i[1] + AI, i[2] + AI, i[3] + BI, i[4] + BI)
-                            for i in difflib.SequenceMatcher(None, a, b).get_opcodes()
-                        ]
-                    )
+    def docheck(self, file1, file2):
+        """Initiate comparing of two files. Reports the result and
+        returns whether the files differ."""
+        result = self.check(file1, file2)
+        self.report.result(result)
+        return result.differ
+
+    def check(self, file1, file2):
+        """Compare two files, return the `Result` including the time
+        taken."""
+        before = dict(STATS.timers)
+        start = time.perf_counter()
+        result = self.compare(file1, file2)
+        result.seconds = time.perf_counter() - start
+        STATS.addfile(file1, file2, result.seconds, before)
+        return result
+
+    def compare(self, file1, file2):
+        """Compare two files, return a `Result`.
+
+        Files with identical contents compare equal whatever options
+        are given, they are not read line by line. `file2` is read
+        ahead in the background while `file1` is read."""
+        self.prefetch(file2)
+        if samecontent(file1, file2):
+            self.identical += 1
+            return Result(file1, file2, False, deviation=Deviation())
+        if self.args.stream:
+            return self.streamcheck(file1, file2)
+        key = None
+        if self.cache is not None:
+            key = self.cache.key(file1, file2, self.resultoptions())
+            cached = self.cache.get(key)
+            if cached is not None and (
+                cached[2]["deviation"] is not None or not self.report.details
+            ):
+                STATS.count("cache_hits")
+                differ, body, info = cached
+                return Result(
+                    file1,
+                    file2,
+                    differ,
+                    "*** %s\n--- %s\n%s" % (file1, file2, body) if differ else "",
+                    [tuple(i) for i in info["opcodes"]],
+                    info["deviation"] and Deviation.fromdict(info["deviation"]),
+                )
+        with STATS.timer("read"):
+            lines1 = list(self.readlines(file1))
+            lines2 = list(self.readlines(file2))
+
+        self.parsed = ({}, {}) if self.report.details else None
+        limit = self.hunklimit()
+        if limit == 0:
+            # Only the verdict is needed. Without an equal number of
+            # lines some lines cannot be matched.
+            differ = len(lines1) != len(lines2) or self.rowsdiffer(lines1, lines2)
+            return Result(file1, file2, differ, None)
+        my_answer = self.align(lines1, lines2, limit)
 
         if self.args.verbose:
             print("lines1:")
@@ -219,30 +359,373 @@ Compare two text files with taking into account numerical errors.
                 lineterm="",
             )
         )
-        if bool(res):
-            if self.args.brief:
-                print("Files %s and %s differ" % (file1, file2))
-            else:
-                print(res)
-        return bool(res)
+        if my_answer.truncated:
+            res += "\n*** stopped after %d differing hunks ***" % limit
+        result = Result(file1, file2, bool(res), res, my_answer)
+        if self.report.details:
+            with STATS.timer("deviation"):
+                result.deviation = Deviation.fromlines(
+                    result.opcodes, lines1, lines2, self.comparator, self.parsed
+                )
+        self.parsed = None
+        if key is not None:
+            self.cache.put(
+                key,
+                result.differ,
+                res.split("\n", 2)[2] if res else "",
+                {
+                    "opcodes": result.opcodes,
+                    "deviation": result.deviation and result.deviation.todict(),
+                },
+            )
+        return result
 
-    def shorttree(self, base, dirs, fnames, iDir):
-        r"""Shorten list `tree` with entries from parsing a directory
-        tree for the base dir part `iDir`.
+    def rowsdiffer(self, lines1, lines2):
+        """Return whether the equally long `lines1` and `lines2` are
+        aligned with a differing hunk.
 
-        >>> w = Main()
-        >>> w.shorttree(iDir='ref/1', *('ref/1', ['1', '.svn'], ['2', '3', '4'])
-        ...     ) == ['1', '.svn', '2', '3', '4']
+        Lines with equal numbers can only be aligned without differing
+        hunks by pairing them in order. Pairs are compared in order, in
+        vectorized steps of `ROWBLOCK` pairs, so the first pair that
+        differs numerically ends the comparison without running the
+        matcher. Only if all pairs are equal are the lines aligned,
+        reusing the parsed lines and stopping at the first differing
+        hunk, as the matcher may still pair repeated lines differently.
+
+        >>> main = Main()
+        >>> main.parse_cmdline(["a", "b"])
+        >>> main.rowsdiffer(["a 1", "b 2"], ["a 1", "b 2.000000001"])
+        False
+        >>> main.rowsdiffer(["a 1", "b 2"], ["a 1", "b 3"])
         True"""
-        if self.exclude(os.path.split(base)[-1]):
-            return []
+        line = self.comparator.line
+        self.parsed = parsed1, parsed2 = {}, {}
+        try:
+            with STATS.timer("match"):
+                for lo in range(0, len(lines1), self.ROWBLOCK):
+                    hi = min(lo + self.ROWBLOCK, len(lines1))
+                    a = [line(i) for i in lines1[lo:hi]]
+                    b = [line(i) for i in lines2[lo:hi]]
+                    parsed1.update(zip(range(lo, hi), a))
+                    parsed2.update(zip(range(lo, hi), b))
+                    flags = rows_equal(a, b) or [False] * len(a)
+                    for k, equal in enumerate(flags):
+                        if (
+                            not equal
+                            and lines1[lo + k] != lines2[lo + k]
+                            and not a[k] == b[k]
+                        ):
+                            return True
+            return bool(self.align(lines1, lines2, 0).truncated)
+        finally:
+            self.parsed = None
+
+    def hunklimit(self):
+        """Return the number of differing hunks after which comparing
+        stops, 0 if only the verdict is needed, or `None`."""
+        if (
+            self.args.brief
+            and not self.report.details
+            and not self.args.verbose
+            and self.cache is None
+        ):
+            return 0
+        return self.args.max_hunks
+
+    def prefetch(self, *fnames):
+        """Have the files `fnames` read into the page cache in the
+        background. Not done with `--stream`, the files may not fit."""
+        if not self.args.stream:
+            PREFETCH(*fnames)
+
+    def resultoptions(self):
+        """Return the options affecting the result of a comparison.
+        The number of jobs counts, the segments aligned in parallel
+        depend on it."""
+        return tuple(
+            sorted(
+                (key, value)
+                for key, value in self.optdict.items()
+                if key not in ("brief", "verbose")
+            )
+        ) + (
+            self.args.context,
+            tuple(self.args.ignore_matching_lines),
+            self.algorithm,
+            self.args.max_hunks,
+            max(self.jobs, 1),
+            self.SEGMENTLINES,
+        )
+
+    def streamcheck(self, file1, file2):
+        """Compare two files without reading them into memory
+        completely. Differences are printed as soon as they are known
+        with the text report, the rendered diff is not kept."""
+        diff = StreamDiff(
+            self.readlines(file1),
+            self.readlines(file2),
+            self.align,
+            n=self.args.context,
+            window=self.args.window,
+        )
+        result = Result(file1, file2, False, None)
+        truncated = []
+
+        def record(groups):
+            for count, group in enumerate(groups):
+                if count == self.args.max_hunks:
+                    truncated.append(True)
+                    break
+                result.differ = True
+                result.opcodes.extend(group)
+                yield group
+
+        show = type(self.report) is TextReport and not self.args.brief
+        for line in context_hunks(
+            record(diff.groups()), diff.lines1, diff.lines2, file1, file2, lineterm=""
+        ):
+            if self.args.brief:
+                break
+            if show:
+                print(line)
+        if truncated and show:
+            print("*** stopped after %d differing hunks ***" % self.args.max_hunks)
+        return result
 
-        if iDir.endswith(os.path.sep):
-            i = len(iDir)
+    def align(self, lines1, lines2, limit=None):
+        """Align the lines of two files, return a `DiffList`.
+
+        Identical leading and trailing lines are split off first, only
+        the differing middle part is aligned by the algorithm chosen
+        with `--algorithm`, `difflib.SequenceMatcher` by default. Its
+        `replace` blocks are then compared numerically. With more than
+        one job the middle part may be aligned in `segments` by a
+        process pool.
+
+        With `limit` aligning stops when a differing hunk follows
+        `limit` ones, the `truncated` attribute of the result is set
+        then.
+
+        >>> main = Main()
+        >>> main.parse_cmdline(["a", "b"])
+        >>> lines1 = ["a 1", "b", "c", "d", "e", "f", "g", "h", "i 1"]
+        >>> lines2 = ["a 2", "b", "c", "d", "e", "f", "g", "h", "i 2"]
+        >>> main.align(lines1, lines2, 1).vals
+        [('replace', 0, 1, 0, 1), ('equal', 1, 8, 1, 8)]"""
+        my_answer = DiffList(maxchunk=10)
+        my_answer.truncated = False
+        hunks = None if limit is None else _HunkLimit(limit, self.args.context)
+        if self.args.verbose:
+            print("difflib.SequenceMatcher(None, lines1, lines2).get_opcodes()")
+            print(difflib.SequenceMatcher(None, lines1, lines2).get_opcodes())
+        head, tail = self.common_ends(lines1, lines2)
+        end1, end2 = len(lines1) - tail, len(lines2) - tail
+        if head:
+            my_answer.append(("equal", 0, head, 0, head))
+        spans = [(head, end1, head, end2)]
+        if hunks is None:
+            spans = self.segments(lines1, lines2, *spans[0])
+        if len(spans) > 1:
+            blocks = self.alignsegments(lines1, lines2, spans)
         else:
-            i = len(iDir) + 1
-        lBase = base[i:]
-        return [os.path.join(lBase, j) for j in dirs + fnames if not self.exclude(j)]
+            blocks = self.blocks(lines1, lines2, *spans[0])
+        for block in blocks:
+            if hunks is None:
+                my_answer.extend(block)
+                continue
+            for op in block:
+                if hunks.exceeded(op):
+                    my_answer.truncated = True
+                    return my_answer
+                my_answer.append(op)
+        if tail:
+            my_answer.append(("equal", end1, len(lines1), end2, len(lines2)))
+        return my_answer
+
+    def blocks(self, lines1, lines2, lo1, hi1, lo2, hi2):
+        """Align `lines1[lo1:hi1]` and `lines2[lo2:hi2]`, yield a list
+        of opcodes for each opcode found by the algorithm, with the
+        `replace` blocks compared numerically."""
+        with STATS.timer("match"):
+            opcodes = getopcodes(lines1[lo1:hi1], lines2[lo2:hi2], self.algorithm)
+        for (tag, ai, aj, bi, bj) in opcodes:
+            ai, aj, bi, bj = ai + lo1, aj + lo1, bi + lo2, bj + lo2
+            if tag in ("delete", "insert", "equal"):
+                yield [(tag, ai, aj, bi, bj)]
+                continue
+            with STATS.timer("rematch"):
+                block = self.cmpblock(lines1, lines2, ai, aj, bi, bj)
+            yield block
+
+    def segments(self, lines1, lines2, lo1, hi1, lo2, hi2):
+        """Return the `(lo1, hi1, lo2, hi2)` ranges of the segments
+        `lines1[lo1:hi1]` and `lines2[lo2:hi2]` are aligned in.
+
+        With more than one job, large ranges are split at anchor lines,
+        occurring once in both files between equal lines, into about
+        four segments per job, but at least `SEGMENTLINES` lines long.
+        The segments are aligned independently. The result is a valid
+        alignment of the whole range, but where lines could be aligned
+        in several ways, e.g. with repeated lines, it need not be the
+        one found without splitting, and it may have a few more
+        differing lines.
+
+        >>> main = Main()
+        >>> main.jobs, main.SEGMENTLINES = 2, 5
+        >>> lines = ["%d" % i for i in range(20)]
+        >>> main.segments(lines, lines[:10] + ["x"] + lines[11:], 0, 20, 0, 20)
+        [(0, 5, 0, 5), (5, 12, 5, 12), (12, 20, 12, 20)]"""
+        size = max(hi1 - lo1, hi2 - lo2)
+        if self.jobs <= 1 or size < 2 * self.SEGMENTLINES:
+            return [(lo1, hi1, lo2, hi2)]
+        step = max(size // (4 * self.jobs), self.SEGMENTLINES)
+        result = []
+        start1, start2 = lo1, lo2
+        for i, j in anchors(lines1[lo1:hi1], lines2[lo2:hi2]):
+            i, j = i + lo1, j + lo2
+            if max(i - start1, j - start2) >= step and max(hi1 - i, hi2 - j) >= step:
+                result.append((start1, i, start2, j))
+                start1, start2 = i, j
+        result.append((start1, hi1, start2, hi2))
+        return result
+
+    def alignsegments(self, lines1, lines2, spans):
+        """Align the segments `spans` from `segments` in a process pool,
+        yield the opcode lists as `blocks` does."""
+        pool = _sharedpool(self.jobs)
+        futures = [
+            pool.submit(_alignsegment, lines1[lo1:hi1], lines2[lo2:hi2], self)
+            for lo1, hi1, lo2, hi2 in spans
+        ]
+        for (lo1, _, lo2, _), future in zip(spans, futures):
+            opcodes, stats = future.result()
+            STATS.update(stats, lo1, lo2)
+            yield [
+                (tag, i1 + lo1, i2 + lo1, j1 + lo2, j2 + lo2)
+                for tag, i1, i2, j1, j2 in opcodes
+            ]
+
+    @staticmethod
+    def common_ends(lines1, lines2):
+        """Return the numbers of identical lines at the start and at the
+        end of both lists. The two ranges do not overlap.
+
+        >>> Main.common_ends(list("abcdef"), list("abXYef"))
+        (2, 2)
+        >>> Main.common_ends(list("aXa"), list("a"))
+        (1, 0)
+        >>> Main.common_ends(list("abc"), list("abc"))
+        (3, 0)"""
+        if lines1 == lines2:
+            return len(lines1), 0
+        size = min(len(lines1), len(lines2))
+        head = 0
+        for line1, line2 in zip(lines1, lines2):
+            if line1 != line2:
+                break
+            head += 1
+        tail = 0
+        for line1, line2 in zip(reversed(lines1), reversed(lines2)):
+            if tail == size - head or line1 != line2:
+                break
+            tail += 1
+        return head, tail
+
+    def cmpblock(self, lines1, lines2, ai, aj, bi, bj):
+        """Numerically compare the lines of a `replace` block.
+
+        If both sides have the same length, the rows are checked
+        pairwise in one vectorized step first. Only the rows failing
+        this are matched on `CmpLine` objects, by
+        `difflib.SequenceMatcher` in chunks sized by `chunksize`, or as
+        a whole by the other algorithms, which do not take quadratic
+        time. Blocks shorter than `MINBLOCK` lines are not worth the
+        vectorization overhead."""
+        line = self.comparator.line
+        if self.parsed is None:
+            a = [line(i) for i in lines1[ai:aj]]
+            b = [line(i) for i in lines2[bi:bj]]
+        else:
+            a = _reuse(self.parsed[0], lines1, ai, aj, line)
+            b = _reuse(self.parsed[1], lines2, bi, bj, line)
+            self.parsed[0].update(zip(range(ai, aj), a))
+            self.parsed[1].update(zip(range(bi, bj), b))
+        flags = rows_equal(a, b) if len(a) >= self.MINBLOCK else None
+        if flags is None:
+            spans = [(False, 0, len(a), 0, len(b))]
+        else:
+            STATS.count("row_checks", len(flags))
+            spans = []
+            i = 0
+            for equal, rows in itertools.groupby(flags):
+                j = i + len(list(rows))
+                spans.append((equal, i, j, i, j))
+                i = j
+        result = []
+        algorithm = self.algorithm
+        for equal, i1, i2, j1, j2 in spans:
+            if equal:
+                result.append(("equal", i1 + ai, i2 + ai, j1 + bi, j2 + bi))
+                continue
+            if algorithm != "difflib":
+                AI, BI = i1 + ai, j1 + bi
+                result.extend(
+                    (op[0], op[1] + AI, op[2] + AI, op[3] + BI, op[4] + BI)
+                    for op in getopcodes(a[i1:i2], b[j1:j2], algorithm)
+                )
+                continue
+            size = self.chunksize(a[i1:i2], b[j1:j2])
+            chunks = DiffList.prepres(
+                "replace", i1 + ai, i2 + ai, j1 + bi, j2 + bi, size
+            )
+            STATS.addchunks(i2 - i1, size, chunks)
+            for (_, AI, AJ, BI, BJ) in chunks:
+                result.extend(
+                    (op[0], op[1] + AI, op[2] + AI, op[3] + BI, op[4] + BI)
+                    for op in difflib.SequenceMatcher(
+                        None, a[AI - ai : AJ - ai], b[BI - bi : BJ - bi]
+                    ).get_opcodes()
+                )
+        return result
+
+    def chunksize(self, a, b):
+        """Return the number of lines of the `CmpLine` lists `a` and `b`
+        re-matched together.
+
+        `difflib.SequenceMatcher` keeps the lines in a dictionary,
+        lines with the same skeleton share the hash and are compared
+        number by number. Within a chunk of `size` lines each line
+        takes about `size * share * tokens` token comparisons, with
+        `share` the fraction of line pairs sharing the skeleton and
+        `tokens` the mean number of tokens per line. The largest chunk
+        keeping this below `LINECOST` is used, but at least `MINCHUNK`
+        lines. Large chunks avoid misaligning lines at chunk borders
+        when a block shifted, small ones keep blocks of similar lines
+        with many numbers from taking quadratic time.
+
+        >>> main = Main()
+        >>> main.chunksize([CmpLine("a %d" % i) for i in range(100)],
+        ...                [CmpLine("a %d" % i) for i in range(90)])
+        60
+        >>> main.chunksize([CmpLine("x%d" % i) for i in range(100)],
+        ...                [CmpLine("y%d" % i) for i in range(90)])
+        100"""
+        size = max(len(a), len(b))
+        if size <= self.MINCHUNK:
+            return size
+        step1 = max(len(a) // self.CHUNKSAMPLE, 1)
+        step2 = max(len(b) // self.CHUNKSAMPLE, 1)
+        sample1, sample2 = a[::step1], b[::step2]
+        counts = collections.Counter(i.skeleton() for i in sample1)
+        pairs = sum(counts[i.skeleton()] for i in sample2)
+        if not pairs:
+            return size
+        share = pairs / (len(sample1) * len(sample2))
+        tokens = sum(len(i.skeleton()) for i in sample1 + sample2) / (
+            len(sample1) + len(sample2)
+        )
+        chunk = int(self.LINECOST / (share * max(tokens, 1)))
+        return min(max(chunk, self.MINCHUNK), size)
 
     @staticmethod
     def lstcomp(lst1, lst2):
@@ -251,43 +734,24 @@ Compare two text files with taking into account numerical errors.
 
             >>> Main().lstcomp([1,2,3,5,6], [1,3,4,5])
             [(1, 1), (2, None), (3, 3), (None, 4), (5, 5), (6, None)]"""
-        ilst1 = iter(sorted(lst1))
-        ilst2 = iter(sorted(lst2))
+        lst1, lst2 = sorted(lst1), sorted(lst2)
+        len1, len2 = len(lst1), len(lst2)
         result = []
-        for el1 in ilst1:
-            try:
-                if sys.version_info < (3, 1):
-                    el2 = ilst2.next()
-                else:
-                    el2 = next(ilst2)
-            except StopIteration:
-                el2 = None
-            if el1 == el2 or el2 is None:
-                result.append((el1, el2))
-            elif el1 in lst2:
-                while el2 not in lst1:
-                    result.append((None, el2))
-                    if sys.version_info < (3, 1):
-                        el2 = ilst2.next()
-                    else:
-                        el2 = next(ilst2)
-                result.append((el1, el2))
-            elif el2 in lst1:
-                while el1 not in lst2:
-                    result.append((el1, None))
-                    if sys.version_info < (3, 1):
-                        el1 = ilst1.next()
-                    else:
-                        el1 = next(ilst1)
+        i = j = 0
+        while i < len1 and j < len2:
+            el1, el2 = lst1[i], lst2[j]
+            if el1 == el2:
                 result.append((el1, el2))
+                i += 1
+                j += 1
             elif el1 < el2:
                 result.append((el1, None))
-                result.append((None, el2))
+                i += 1
             else:
                 result.append((None, el2))
-                result.append((el1, None))
-        for el2 in ilst2:
-            result.append((None, el2))
+                j += 1
+        result.extend((el1, None) for el1 in lst1[i:])
+        result.extend((None, el2) for el2 in lst2[j:])
         return result
 
     def iscomment(self, line):
@@ -299,20 +763,41 @@ Compare two text files with taking into account numerical errors.
 
     def dirtreecomp(self, dir1, dir2):
         """Compare two directory trees for common enties."""
-        tree1 = os.walk(dir1, topdown=True)
-        tree2 = os.walk(dir2, topdown=True)
-        res_tree1 = []
-        res_tree2 = []
-        for xtree1, xtree2 in zip(tree1, tree2):
-            dirs, files = xtree1[1:]
-            [dirs.remove(i) for i in dirs[::-1] if self.exclude(i)]
-            [files.remove(i) for i in files[::-1] if self.exclude(i)]
-            res_tree1 += self.shorttree(xtree1[0], dirs, files, iDir=dir1)
-            dirs, files = xtree2[1:]
-            [dirs.remove(i) for i in dirs[::-1] if self.exclude(i)]
-            [files.remove(i) for i in files[::-1] if self.exclude(i)]
-            res_tree2 += self.shorttree(xtree2[0], dirs, files, iDir=dir2)
-        return self.lstcomp(res_tree1, res_tree2)
+        return [(i, j) for i, j, _, _ in self.treepairs(dir1, dir2)]
+
+    def treepairs(self, dir1, dir2):
+        """Pair the entries of two directory trees. Returns a list of
+        tuples of the relative paths and the file objects, with `None`
+        for entries missing in one tree. A compressed file is paired
+        with the file of its name without the compression suffix in the
+        other tree."""
+        tree1 = scantree(dir1, self.exclude)
+        tree2 = scantree(dir2, self.exclude)
+        names1 = self.pairnames(tree1, tree2)
+        names2 = self.pairnames(tree2, tree1)
+        result = []
+        for i, j in self.lstcomp(names1, names2):
+            i, j = names1.get(i), names2.get(j)
+            result.append((i, j, tree1.get(i), tree2.get(j)))
+        return result
+
+    @staticmethod
+    def pairnames(tree, other):
+        """Return dictionary mapping the names the entries of `tree`
+        are paired by with the entries of `other` to their paths. These
+        are the paths, but compressed files only in `tree` are paired
+        by the name of an uncompressed file only in `other`."""
+        result = {}
+        for name, obj in tree.items():
+            if (
+                isinstance(obj, CompressedFile)
+                and name not in other
+                and obj.plain in other
+                and obj.plain not in tree
+            ):
+                name = obj.plain
+            result[name] = obj.path
+        return result
 
     @staticmethod
     def onlyIn(base, name):
@@ -329,32 +814,93 @@ Compare two text files with taking into account numerical errors.
         if not os.path.isdir(dir2):
             raise ValueError("'%s' is not directory" % dir2)
         failed = False
-        composite = self.dirtreecomp(dir1, dir2)
-        for i, j in composite:
+        plan = self.treepairs(dir1, dir2)
+        results = self.submit(plan)
+        # File pairs compared here, the next one is read ahead while
+        # the current one is compared.
+        ahead = iter(
+            [
+                (obj1.name, obj2.name)
+                for _, _, obj1, obj2 in plan
+                if obj1 is not None
+                and obj2 is not None
+                and self.isfilepair(obj1, obj2)
+                and obj1.name not in results
+            ]
+        )
+        first = next(ahead, None)
+        if first is not None:
+            self.prefetch(first[1])
+        for i, j, obj1, obj2 in plan:
             if i is not None:
-                print(
-                    "comparing '%s' and '%s'"
-                    % (os.path.join(dir1, i), os.path.join(dir2, j if j else i))
+                self.report.comparing(
+                    os.path.join(dir1, i), os.path.join(dir2, j if j else i)
                 )
             if j is None:
-                self.onlyIn(dir1, i)
+                self.report.onlyin(dir1, i)
                 failed = True
                 continue
             elif i is None:
-                self.onlyIn(dir2, j)
+                self.report.onlyin(dir2, j)
                 failed = True
                 continue
-            obj1 = fileFactory(i, dir1)
-            obj2 = fileFactory(j, dir2)
-            if (obj1.__class__ != obj2.__class__) and not (
-                isinstance(obj1, RegularFile) and isinstance(obj2, RegularFile)
-            ):
-                print("File %s while file %s" % (obj1, obj2))
+            if self.isfilepair(obj1, obj2) is None:
+                self.report.mismatch(obj1, obj2)
                 failed = True
             elif not isinstance(obj1, Directory):
-                failed = self.docheck(obj1.name, obj2.name) or failed
+                if obj1.name in results:
+                    out, result, identical, stats = results[obj1.name].result()
+                    sys.stdout.write(out)
+                    self.identical += identical
+                    STATS.update(stats)
+                    self.report.result(result)
+                    failed = result.differ or failed
+                else:
+                    self.prefetch(*next(ahead, ()))
+                    failed = self.docheck(obj1.name, obj2.name) or failed
+        if self.args.verbose:
+            print("%d file pairs with identical contents" % self.identical)
         return failed
 
+    @staticmethod
+    def isfilepair(obj1, obj2):
+        """Return whether `obj1` and `obj2` are two regular files, or
+        `None` if they are of incompatible kinds."""
+        if (obj1.__class__ != obj2.__class__) and not (
+            isinstance(obj1, RegularFile) and isinstance(obj2, RegularFile)
+        ):
+            return None
+        return not isinstance(obj1, Directory)
+
+    def submit(self, plan):
+        """Submit the file comparisons from `plan` to a process pool
+        when running with more than one job. The largest files are
+        started first. Returns a dictionary mapping the first file name
+        to a future for the captured output and result of `check`."""
+        if self.args.jobs <= 1:
+            return {}
+        pairs = [
+            (obj1, obj2)
+            for _, _, obj1, obj2 in plan
+            if obj1 is not None and obj2 is not None and self.isfilepair(obj1, obj2)
+        ]
+        pairs.sort(key=lambda x: x[0].size + x[1].size, reverse=True)
+        if self.persistent:
+            # Workers of a kept pool get the current instance with each
+            # task.
+            pool = _sharedpool(self.args.jobs)
+            return {
+                i.name: pool.submit(_docheck, i.name, j.name, self) for i, j in pairs
+            }
+        import concurrent.futures
+
+        pool = concurrent.futures.ProcessPoolExecutor(
+            self.args.jobs, initializer=_initworker, initargs=(self,)
+        )
+        results = {i.name: pool.submit(_docheck, i.name, j.name) for i, j in pairs}
+        pool.shutdown(wait=False)
+        return results
+
     @staticmethod
     def columns(inp):
         """
@@ -362,9 +908,11 @@ Compare two text files with taking into account numerical errors.
         [8, 24, 40, 56, 72, 80]"""
         return [int(i) for i in inp.split(",")]
 
-    def parse_cmdline(self):
+    def parse_cmdline(self, argv=None, **options):
         """
-        Parse command line."""
+        Parse command line `argv`, default `sys.argv[1:]`. Keyword
+        arguments override the parsed options, keys are the option
+        names with "_" for "-"."""
         parser = ArgumentParser(description=self.DOC)
         parser.add_argument("from_file", metavar="<from file>", type=str)
         parser.add_argument("to_file", metavar="<to file>", type=str)
@@ -435,7 +983,9 @@ Compare two text files with taking into account numerical errors.
             "--fixcols",
             type=self.columns,
             help="""Comma separated list of columns for
-                           fixed column format files""",
+                           fixed column format files. Fields in
+                           Fortran notation like "1.5-3" or "1.5D-3"
+                           are read as numbers.""",
         )
         parser.add_argument(
             "-r",
@@ -445,6 +995,19 @@ Compare two text files with taking into account numerical errors.
             help="""Recursively
                             compare any subdirectories found.""",
         )
+        parser.add_argument(
+            "-j",
+            "--jobs",
+            type=int,
+            default=1,
+            metavar="N",
+            help="""Compare up to N file pairs in parallel
+                            processes in recursive mode. Large files
+                            are split into segments aligned in
+                            parallel, repeated lines may then be
+                            aligned differently than in a single
+                            process. Default: %(default)d""",
+        )
         parser.add_argument(
             "-x",
             "--exclude",
@@ -470,6 +1033,106 @@ Compare two text files with taking into account numerical errors.
             help="""Output only whether files
                             differ.""",
         )
+        parser.add_argument(
+            "--max-hunks",
+            type=int,
+            default=None,
+            metavar="N",
+            help="""Stop comparing a pair of files after N
+                            differing hunks. With --brief comparing
+                            stops at the first difference.""",
+        )
+        parser.add_argument(
+            "--stream",
+            action="store_true",
+            help="""Compare the files in a sliding window of
+                            lines instead of reading them completely,
+                            for files too big to fit into memory.""",
+        )
+        parser.add_argument(
+            "--window",
+            type=int,
+            default=10000,
+            metavar="LINES",
+            help="""Number of lines of each file in the
+                            sliding window used with --stream.
+                            Default: %(default)d""",
+        )
+        parser.add_argument(
+            "--algorithm",
+            choices=ALGORITHMS,
+            default="difflib",
+            help="""Algorithm aligning the lines, "difflib" as
+                            from Python's difflib module, "myers" for
+                            a minimal number of differing lines,
+                            "patience" or "histogram" for matching
+                            distinctive lines first. The last three
+                            take O((N+M)D) time for N and M lines and
+                            D differences. Default: %(default)s""",
+        )
+        parser.add_argument(
+            "--cache",
+            metavar="FILE",
+            default=None,
+            help="""Keep comparison results in the SQLite
+                            database FILE and reuse them for unchanged
+                            files and options.""",
+        )
+        parser.add_argument(
+            "--cache-size",
+            type=int,
+            default=10000,
+            metavar="N",
+            help="""Maximum number of results kept in the
+                            cache, least recently used ones are
+                            dropped. Default: %(default)d""",
+        )
+        parser.add_argument(
+            "--format",
+            choices=sorted(REPORTS),
+            default="text",
+            help="""Output format, "text" as from diff,
+                            "jsonl" for one JSON record per compared
+                            pair, including the largest numerical
+                            deviations, or "junit" for a JUnit XML
+                            report. Default: %(default)s""",
+        )
+        parser.add_argument(
+            "--stats",
+            action="store_true",
+            help="""Report the time spent reading and matching,
+                            counts of line and number comparisons,
+                            and the slowest comparisons on standard
+                            error.""",
+        )
+        parser.add_argument(
+            "--summary",
+            action="store_true",
+            help="""Report the largest absolute and relative
+                            numerical deviation of differing files,
+                            with their lines and columns, and the
+                            numbers of relative deviations per column
+                            by order of magnitude.""",
+        )
+        parser.add_argument(
+            "--serve",
+            action="store_true",
+            help="""Run as server on the socket given by
+                            --socket, no files are compared. Other
+                            numdiff runs have the server do their
+                            work, saving the start up time, and run
+                            by themselves if no server is running.""",
+        )
+        parser.add_argument(
+            "--socket",
+            metavar="PATH",
+            default=None,
+            help="""Unix domain socket of the server. Default:
+                            $NUMDIFF_SOCKET, or numdiff.sock in
+                            $XDG_RUNTIME_DIR, or in numdiff-<uid> in
+                            $TMPDIR or /tmp. An empty NUMDIFF_SOCKET
+                            disables the server.""",
+        )
         parser.add_argument(
             "--matlab",
             action="store_true",
@@ -480,7 +1143,37 @@ Compare two text files with taking into account numerical errors.
             "--verbose", action="store_true", help="""Generate verbose output."""
         )
 
-        self.args = parser.parse_args()
+        self.args = parser.parse_args(argv)
+        actions = {action.dest: action for action in parser._actions}
+        for key, value in options.items():
+            action = actions.get(key)
+            if key in ("from_file", "to_file") or action is None:
+                raise TypeError("unknown option '%s'" % key)
+            if value is not None and action.type in (int, float):
+                types = int if action.type is int else (int, float)
+                if not isinstance(value, types) or isinstance(value, bool):
+                    raise TypeError(
+                        "option '%s' needs a number, not %r" % (key, value)
+                    )
+            if action.choices is not None and value not in action.choices:
+                raise ValueError(
+                    "option '%s' is %r, not one of %s"
+                    % (key, value, ", ".join(map(repr, action.choices)))
+                )
+            setattr(self.args, key, value)
+
+        def error(message):
+            # Options passed as keyword arguments by `compare_files`
+            # and `compare_trees` are reported as `ValueError`.
+            if options:
+                raise ValueError(message)
+            parser.error(message)
+
+        if self.args.max_hunks is not None and self.args.max_hunks < 1:
+            error("--max-hunks must be at least 1")
+        if self.args.verbose and self.args.format != "text":
+            # The debugging output would break the records.
+            error("--verbose is only possible with --format text")
 
         if self.args.verbose:
             print("options: aTol: %g; rTol: %g" % (self.args.aeps, self.args.reps))
@@ -499,9 +1192,154 @@ Compare two text files with taking into account numerical errors.
             ).search
 
 
-def main():
+class _HunkLimit(object):
+    """Count the differing hunks of a context diff with `context`
+    lines of context while the opcodes are found."""
+
+    def __init__(self, limit, context):
+        self.limit = limit
+        self.context = context
+        self.hunks = 0
+        self.end = None
+
+    def exceeded(self, op):
+        """Return whether opcode `op` starts a hunk beyond the limit."""
+        tag, i1, i2, j1, j2 = op
+        if tag == "equal":
+            return False
+        if self.end is None or i1 - self.end > 2 * self.context:
+            # Like `get_grouped_opcodes`, longer runs of equal lines
+            # separate the hunks.
+            self.hunks += 1
+            if self.hunks > self.limit:
+                return True
+        self.end = i2
+        return False
+
+
+def _reuse(parsed, lines, lo, hi, line):
+    """Return `CmpLine` objects for `lines[lo:hi]`, taken from the
+    dictionary `parsed` by line index if there, else made by `line`."""
+    result = []
+    get = parsed.get
+    for k in range(lo, hi):
+        obj = get(k)
+        result.append(line(lines[k]) if obj is None else obj)
+    return result
+
+
+def _nomatch(name):
+    """Default for pattern matching options, nothing matches."""
+    return None
+
+
+# `Main` instance used by process pool workers.
+_PROG = None
+
+
+def _initworker(prog):
+    """Set up process pool worker for running `prog.docheck`."""
+    global _PROG
+    _PROG = prog
+    # Workers do not split their files any further, the parsed lines
+    # of segments are not sent back.
+    prog.jobs = 1
+    prog.parsed = None
+    if prog.args.stats:
+        STATS.enable()
+    else:
+        STATS.disable()
+
+
+# Process pools kept by `Main` instances with `persistent` set, by
+# number of workers.
+_POOLS = {}
+
+
+def _sharedpool(jobs):
+    """Return kept process pool with `jobs` workers."""
+    import concurrent.futures
+
+    pool = _POOLS.get(jobs)
+    if pool is None or getattr(pool, "_broken", False):
+        pool = _POOLS[jobs] = concurrent.futures.ProcessPoolExecutor(jobs)
+    return pool
+
+
+def _docheck(file1, file2, prog=None):
+    """Compare two files in a pool worker, return the captured output,
+    the `Result`, the number of identical files found, and the
+    collected statistics. The worker is set up for `prog` first, if
+    given."""
+    if prog is not None:
+        _initworker(prog)
+    out = io.StringIO()
+    identical = _PROG.identical
+    STATS.clear()
+    with contextlib.redirect_stdout(out):
+        result = _PROG.check(file1, file2)
+    return out.getvalue(), result, _PROG.identical - identical, STATS.todict()
+
+
+def _alignsegment(lines1, lines2, prog):
+    """Align the lines of a segment of two files in a pool worker for
+    `prog`, return the opcodes and the collected statistics."""
+    _initworker(prog)
+    STATS.clear()
+    opcodes = []
+    for block in _PROG.blocks(lines1, lines2, 0, len(lines1), 0, len(lines2)):
+        opcodes.extend(block)
+    return opcodes, STATS.todict()
+
+
+def _prepare(file1, file2, options):
+    """Return `Main` instance set up for comparing `file1` and `file2`
+    with keyword `options`, collecting the results."""
     prog = Main()
-    raise SystemExit(prog())
+    prog.parse_cmdline([file1, file2], **options)
+    prog.setup(CollectReport())
+    return prog
+
+
+def compare_files(file1, file2, **options):
+    """Compare two files without printing, return a `Result`.
+
+    `options` are the command line options, named by their long form
+    with "_" for "-", e.g. `compare_files(a, b, aeps=1e-6,
+    comment_char="#", fixcols=[8, 16])`. Unknown options and values of
+    the wrong type raise `TypeError`, invalid values `ValueError`."""
+    return _prepare(file1, file2, options).check(file1, file2)
+
+
+def compare_trees(dir1, dir2, **options):
+    """Compare the files in two directory trees without printing,
+    return a list of `Result`, one for each compared entry.
+
+    Entries found only in one tree have `verdict` "only" and `file2`
+    `None`, entries of different kinds have `verdict` "mismatch".
+    `options` are as for `compare_files`, e.g. `jobs` and `exclude`."""
+    prog = _prepare(dir1, dir2, options)
+    prog.deepcheck(dir1, dir2)
+    return prog.report.results
+
+
+def _socketarg(argv):
+    """Return the `--socket` argument from command line `argv`."""
+    parser = ArgumentParser(add_help=False)
+    parser.add_argument("--socket", default=None)
+    return parser.parse_known_args(argv)[0].socket
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    if "--serve" in argv:
+        raise SystemExit(server.main(argv))
+    status = server.forward(argv, _socketarg(argv))
+    if status is None:
+        prog = Main()
+        status = prog(argv)
+    raise SystemExit(status)
 
 
 # Local Variables:
@@ -0,0 +1,348 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Alignment of two sequences of lines.
+
+All algorithms return the `(tag, i1, i2, j1, j2)` opcodes of
+`difflib.SequenceMatcher.get_opcodes`. Lines are only compared using
+`==`, and `hash` for "patience" and "histogram", so they work on
+strings as well as on `CmpLine` objects comparing numbers with a
+tolerance.
+
+- "difflib": `difflib.SequenceMatcher`, the default;
+- "myers": shortest edit script by Myers' O((N+M)D) algorithm in
+  linear space, the differing lines are kept to a minimum;
+- "patience": lines occurring once in both sequences are matched
+  first, the remaining parts by "myers";
+- "histogram": the least frequent lines are matched first, extending
+  the matches to the longest common region, as done by git.
+
+>>> for opcode in getopcodes("abcabba", "cbabac", "myers"):
+...     print(opcode)
+('replace', 0, 1, 0, 1)
+('equal', 1, 2, 1, 2)
+('delete', 2, 3, 2, 2)
+('equal', 3, 5, 2, 4)
+('delete', 5, 6, 4, 4)
+('equal', 6, 7, 4, 5)
+('insert', 7, 7, 5, 6)
+"""
+
+# Standard libraries.
+import bisect
+import difflib
+
+__date__ = "2026/10/18 17:00:00 hoel"
+__author__ = "Berthold Höllmann"
+__copyright__ = "Copyright © 2026 by DNV GL SE"
+__credits__ = ["Berthold Höllmann"]
+__maintainer__ = "Berthold Höllmann"
+__email__ = "berthold.hoellmann@dnvgl.com"
+
+
+__all__ = ["getopcodes", "matching_blocks", "anchors", "ALGORITHMS"]
+
+# Lines occurring more often than this are not used as anchors by
+# "histogram".
+MAXCHAIN = 64
+
+
+def _trim(a, b, alo, ahi, blo, bhi, blocks):
+    """Add the common start and end of the ranges to `blocks`, return
+    the bounds of the remaining middle part."""
+    i = alo
+    j = blo
+    while i < ahi and j < bhi and a[i] == b[j]:
+        i += 1
+        j += 1
+    if i > alo:
+        blocks.append((alo, blo, i - alo))
+    alo, blo = i, j
+    i, j = ahi, bhi
+    while i > alo and j > blo and a[i - 1] == b[j - 1]:
+        i -= 1
+        j -= 1
+    if i < ahi:
+        blocks.append((i, j, ahi - i))
+    return alo, i, blo, j
+
+
+def _middle_snake(a, b, alo, ahi, blo, bhi):
+    """Return start and end `(x, y, u, v)` of the middle snake of an
+    optimal edit path for `a[alo:ahi]` and `b[blo:bhi]`, searching from
+    both ends. The ranges must not start or end with equal lines."""
+    n, m = ahi - alo, bhi - blo
+    delta = n - m
+    odd = delta & 1
+    off = n + m + 1
+    forward = [0] * (2 * off + 1)
+    backward = [0] * (2 * off + 1)
+    for d in range((n + m + 1) // 2 + 1):
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and forward[off + k - 1] < forward[off + k + 1]):
+                x = forward[off + k + 1]
+            else:
+                x = forward[off + k - 1] + 1
+            y = x - k
+            x0, y0 = x, y
+            while x < n and y < m and a[alo + x] == b[blo + y]:
+                x += 1
+                y += 1
+            forward[off + k] = x
+            if (
+                odd
+                and delta - d < k < delta + d
+                and x + backward[off + delta - k] >= n
+            ):
+                return alo + x0, blo + y0, alo + x, blo + y
+        for k in range(-d, d + 1, 2):
+            if k == -d or (
+                k != d and backward[off + k - 1] < backward[off + k + 1]
+            ):
+                x = backward[off + k + 1]
+            else:
+                x = backward[off + k - 1] + 1
+            y = x - k
+            x0, y0 = x, y
+            while x < n and y < m and a[ahi - 1 - x] == b[bhi - 1 - y]:
+                x += 1
+                y += 1
+            backward[off + k] = x
+            if (
+                not odd
+                and -d <= delta - k <= d
+                and x + forward[off + delta - k] >= n
+            ):
+                return ahi - x, bhi - y, ahi - x0, bhi - y0
+    raise AssertionError("no middle snake found")
+
+
+def _myers(a, b, alo, ahi, blo, bhi, blocks):
+    """Add the matching blocks of a shortest edit script for
+    `a[alo:ahi]` and `b[blo:bhi]` to `blocks`.
+
+    Lines without an equal line on the other side cannot match, they
+    are dropped first, as done by GNU diff. This keeps the number of
+    differences `D` seen by the algorithm small for changed lines."""
+    alo, ahi, blo, bhi = _trim(a, b, alo, ahi, blo, bhi, blocks)
+    if alo == ahi or blo == bhi:
+        return
+    in_a = set(a[alo:ahi])
+    in_b = set(b[blo:bhi])
+    keep_a = [i for i in range(alo, ahi) if a[i] in in_b]
+    keep_b = [j for j in range(blo, bhi) if b[j] in in_a]
+    if len(keep_a) == ahi - alo and len(keep_b) == bhi - blo:
+        _snakes(a, b, alo, ahi, blo, bhi, blocks)
+        return
+    found = []
+    _snakes(
+        [a[i] for i in keep_a],
+        [b[j] for j in keep_b],
+        0,
+        len(keep_a),
+        0,
+        len(keep_b),
+        found,
+    )
+    for i, j, n in found:
+        blocks.extend((keep_a[i + k], keep_b[j + k], 1) for k in range(n))
+
+
+def _snakes(a, b, alo, ahi, blo, bhi, blocks):
+    """Add the matching blocks of a shortest edit script for
+    `a[alo:ahi]` and `b[blo:bhi]` found by Myers' algorithm to
+    `blocks`."""
+    todo = [(alo, ahi, blo, bhi)]
+    while todo:
+        alo, ahi, blo, bhi = _trim(a, b, *todo.pop(), blocks=blocks)
+        if alo == ahi or blo == bhi:
+            continue
+        x, y, u, v = _middle_snake(a, b, alo, ahi, blo, bhi)
+        if u > x:
+            blocks.append((x, y, u - x))
+        todo.append((alo, x, blo, y))
+        todo.append((u, ahi, v, bhi))
+
+
+def _lis(pairs):
+    """Return the longest subsequence of `pairs`, sorted by their
+    second element, that is increasing in the first element."""
+    # Smallest end value and chain of the increasing subsequences
+    # found by length.
+    ends = []
+    chains = []
+    for pair in pairs:
+        pos = bisect.bisect_left(ends, pair[0])
+        link = (pair, chains[pos - 1] if pos else None)
+        if pos == len(ends):
+            ends.append(pair[0])
+            chains.append(link)
+        else:
+            ends[pos] = pair[0]
+            chains[pos] = link
+    result = []
+    link = chains[-1] if chains else None
+    while link is not None:
+        result.append(link[0])
+        link = link[1]
+    return result[::-1]
+
+
+def _unique_pairs(a, b, alo, ahi, blo, bhi):
+    """Return the `(i, j)` pairs of lines occurring exactly once in
+    `a[alo:ahi]` and in `b[blo:bhi]`, sorted by `j`."""
+    unique = {}
+    for i in range(alo, ahi):
+        unique[a[i]] = None if a[i] in unique else i
+    seen = {}
+    for j in range(blo, bhi):
+        if unique.get(b[j]) is not None:
+            seen[b[j]] = None if b[j] in seen else (unique[b[j]], j)
+    return [i for i in seen.values() if i is not None]
+
+
+def _patience(a, b, alo, ahi, blo, bhi, blocks):
+    """Add matching blocks of `a[alo:ahi]` and `b[blo:bhi]` anchored
+    at lines unique in both to `blocks`."""
+    todo = [(alo, ahi, blo, bhi)]
+    while todo:
+        alo, ahi, blo, bhi = _trim(a, b, *todo.pop(), blocks=blocks)
+        if alo == ahi or blo == bhi:
+            continue
+        unique = _lis(_unique_pairs(a, b, alo, ahi, blo, bhi))
+        if not unique:
+            _myers(a, b, alo, ahi, blo, bhi, blocks)
+            continue
+        for i, j in unique:
+            todo.append((alo, i, blo, j))
+            blocks.append((i, j, 1))
+            alo, blo = i + 1, j + 1
+        todo.append((alo, ahi, blo, bhi))
+
+
+def _histogram(a, b, alo, ahi, blo, bhi, blocks):
+    """Add matching blocks of `a[alo:ahi]` and `b[blo:bhi]` split at
+    the longest common region around the least frequent lines to
+    `blocks`."""
+    todo = [(alo, ahi, blo, bhi)]
+    while todo:
+        alo, ahi, blo, bhi = _trim(a, b, *todo.pop(), blocks=blocks)
+        if alo == ahi or blo == bhi:
+            continue
+        where = {}
+        for i in range(alo, ahi):
+            where.setdefault(a[i], []).append(i)
+        best = None
+        j = blo
+        while j < bhi:
+            found = where.get(b[j])
+            nxt = j + 1
+            if found and len(found) <= MAXCHAIN and (
+                best is None or len(found) <= best[0]
+            ):
+                for i in found:
+                    s, t = i, j
+                    while s > alo and t > blo and a[s - 1] == b[t - 1]:
+                        s -= 1
+                        t -= 1
+                    e, f = i + 1, j + 1
+                    while e < ahi and f < bhi and a[e] == b[f]:
+                        e += 1
+                        f += 1
+                    if (
+                        best is None
+                        or len(found) < best[0]
+                        or e - s > best[3]
+                    ):
+                        best = (len(found), s, t, e - s)
+                    nxt = max(nxt, f)
+            j = nxt
+        if best is None:
+            _myers(a, b, alo, ahi, blo, bhi, blocks)
+            continue
+        _, s, t, size = best
+        blocks.append((s, t, size))
+        todo.append((alo, s, blo, t))
+        todo.append((s + size, ahi, t + size, bhi))
+
+
+_FINDERS = {"myers": _myers, "patience": _patience, "histogram": _histogram}
+
+
+def matching_blocks(a, b, algorithm="myers"):
+    """Return the `(i, j, n)` triples of matching lines of `a` and `b`,
+    like `difflib.SequenceMatcher.get_matching_blocks`, ending with
+    `(len(a), len(b), 0)`.
+
+    >>> matching_blocks("abxcd", "abycd")
+    [(0, 0, 2), (3, 3, 2), (5, 5, 0)]"""
+    if algorithm == "difflib":
+        return difflib.SequenceMatcher(None, a, b).get_matching_blocks()
+    blocks = []
+    _FINDERS[algorithm](a, b, 0, len(a), 0, len(b), blocks)
+    blocks.sort()
+    result = []
+    for i, j, n in blocks:
+        if result and result[-1][0] + result[-1][2] == i and (
+            result[-1][1] + result[-1][2] == j
+        ):
+            result[-1] = (result[-1][0], result[-1][1], result[-1][2] + n)
+        elif n:
+            result.append((i, j, n))
+    result.append((len(a), len(b), 0))
+    return result
+
+
+def getopcodes(a, b, algorithm="difflib"):
+    """Return the opcodes turning `a` into `b` found by `algorithm`.
+
+    >>> getopcodes("abxcd", "abcd", "histogram")
+    [('equal', 0, 2, 0, 2), ('delete', 2, 3, 2, 2), ('equal', 3, 5, 2, 4)]"""
+    if algorithm == "difflib":
+        return difflib.SequenceMatcher(None, a, b).get_opcodes()
+    i = j = 0
+    result = []
+    for ai, bj, size in matching_blocks(a, b, algorithm):
+        tag = ""
+        if i < ai and j < bj:
+            tag = "replace"
+        elif i < ai:
+            tag = "delete"
+        elif j < bj:
+            tag = "insert"
+        if tag:
+            result.append((tag, i, ai, j, bj))
+        i, j = ai + size, bj + size
+        if size:
+            result.append(("equal", ai, i, bj, j))
+    return result
+
+
+def anchors(a, b):
+    """Return the `(i, j)` pairs of lines occurring exactly once in `a`
+    and in `b`, with the lines before and after them equal as well,
+    increasing in both `i` and `j`. Splitting both sequences at these
+    lines gives parts that can be aligned separately.
+
+    >>> anchors("xabcdy", "zabcdw")
+    [(2, 2), (3, 3)]"""
+    pairs = [
+        (i, j)
+        for i, j in _unique_pairs(a, b, 0, len(a), 0, len(b))
+        if 0 < i < len(a) - 1
+        and 0 < j < len(b) - 1
+        and a[i - 1] == b[j - 1]
+        and a[i + 1] == b[j + 1]
+    ]
+    return _lis(pairs)
+
+
+# Algorithms for the `--algorithm` option.
+ALGORITHMS = ("difflib", "myers", "patience", "histogram")
+
+
+# Local Variables:
+# mode: python
+# compile-command: "python ../../setup.py test"
+# time-stamp-pattern: "30/__date__ = \"%:y/%02m/%02d %02H:%02M:%02S %u\""
+# End:
@@ -0,0 +1,154 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Persistent cache for comparison results.
+"""
+
+# Standard libraries.
+import hashlib
+import json
+import os.path
+import sqlite3
+
+__date__ = "2026/10/18 12:00:00 hoel"
+__author__ = "Berthold Höllmann"
+__copyright__ = "Copyright © 2026 by DNV GL SE"
+__credits__ = ["Berthold Höllmann"]
+__maintainer__ = "Berthold Höllmann"
+__email__ = "berthold.hoellmann@dnvgl.com"
+
+
+__all__ = ["ResultCache"]
+
+# Increase when the alignment, rendering, or layout of stored results
+# changes.
+_VERSION = 6
+
+
+def digest(fname, bufsize=1 << 20):
+    """Return hex digest of the contents of file `fname`."""
+    result = hashlib.blake2b(digest_size=20)
+    with open(fname, "rb") as fobj:
+        for data in iter(lambda: fobj.read(bufsize), b""):
+            result.update(data)
+    return result.hexdigest()
+
+
+class ResultCache(object):
+    """Comparison results stored in a SQLite database.
+
+    Entries are keyed by the digests of both files' contents and the
+    options affecting the result. Each access stamps the entry with an
+    increasing counter, when more than `maxsize` entries are stored,
+    the least recently used ones are removed.
+
+    >>> cache = ResultCache(":memory:", maxsize=2)
+    >>> cache.put("a", True, "diff a", {"opcodes": []})
+    >>> cache.put("b", False, "")
+    >>> cache.get("a")
+    (True, 'diff a', {'opcodes': []})
+    >>> cache.put("c", False, "")
+    >>> cache.get("b") is None
+    True
+    >>> len(cache)
+    2"""
+
+    def __init__(self, fname, maxsize=10000):
+        self.fname = fname
+        self.maxsize = maxsize
+        self._db = None
+
+    # Instances returned by `shared`.
+    _shared = {}
+
+    @classmethod
+    def shared(cls, fname, maxsize=10000):
+        """Return cache for `fname` and `maxsize`, reusing the instance
+        and its open connection from earlier calls."""
+        key = (os.path.abspath(fname), maxsize)
+        if key not in cls._shared:
+            cls._shared[key] = cls(fname, maxsize)
+        return cls._shared[key]
+
+    def __getstate__(self):
+        # Connections are not shared with pool workers.
+        state = self.__dict__.copy()
+        state["_db"] = None
+        return state
+
+    @property
+    def db(self):
+        """Connection to the cache database, opened on first use
+        (property)"""
+        if self._db is None:
+            self._db = sqlite3.connect(self.fname, timeout=60)
+            with self._db:
+                # Results stored by other versions are dropped.
+                if self._db.execute("PRAGMA user_version").fetchone()[0] != _VERSION:
+                    self._db.execute("DROP TABLE IF EXISTS results")
+                    self._db.execute("PRAGMA user_version = %d" % _VERSION)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS results "
+                    "(key TEXT PRIMARY KEY, differ INTEGER, diff TEXT, info TEXT, "
+                    "used INTEGER)"
+                )
+                self._db.execute(
+                    "CREATE INDEX IF NOT EXISTS results_used ON results (used)"
+                )
+        return self._db
+
+    @staticmethod
+    def key(file1, file2, options):
+        """Return the key for comparing `file1` and `file2` with the
+        result relevant `options`.
+
+        >>> ResultCache.key('Makefile', 'Makefile', (1e-5,)) == (
+        ...     ResultCache.key('Makefile', 'Makefile', (1e-6,)))
+        False"""
+        return "%d:%s:%s:%s" % (
+            _VERSION,
+            digest(file1),
+            digest(file2),
+            hashlib.sha1(repr(options).encode("utf-8")).hexdigest(),
+        )
+
+    def get(self, key):
+        """Return tuple of verdict, rendered diff, and additional
+        information stored for `key`, or `None`."""
+        with self.db:
+            row = self.db.execute(
+                "SELECT differ, diff, info FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self.db.execute(
+                "UPDATE results SET used = (SELECT MAX(used) FROM results) + 1 "
+                "WHERE key = ?",
+                (key,),
+            )
+        return bool(row[0]), row[1], json.loads(row[2])
+
+    def put(self, key, differ, diff, info=None):
+        """Store verdict `differ`, rendered `diff`, and the JSON
+        serializable `info` for `key`."""
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, "
+                "(SELECT COALESCE(MAX(used), 0) + 1 FROM results))",
+                (key, int(differ), diff, json.dumps(info)),
+            )
+            self.db.execute(
+                "DELETE FROM results WHERE key IN (SELECT key FROM results "
+                "ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                (self.maxsize,),
+            )
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+
+# Local Variables:
+# mode: python
+# compile-command: "python ../../setup.py test"
+# time-stamp-pattern: "30/__date__ = \"%:y/%02m/%02d %02H:%02M:%02S %u\""
+# End:
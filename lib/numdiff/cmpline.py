@@ -5,7 +5,14 @@ Class for allowing numerical diffing of text lines.
 """
 
 # Standard libraries.
+import operator
 import re
+from array import array
+
+# Third party libraries, NumPy is optional. It is imported on first
+# use by `_numpy` to keep the start up short.
+numpy = None
+_NUMPY_TRIED = False
 
 __date__ = "2022/04/30 19:08:23 hoel"
 __author__ = "Berthold Höllmann"
@@ -15,17 +22,136 @@ __maintainer__ = "Berthold Höllmann"
 __email__ = "berthold.hoellmann@dnvgl.com"
 
 
-__all__ = ["CmpLine"]
+__all__ = ["Comparator", "CmpLine", "rows_equal"]
 
 _FLOAT = re.compile(r"\s*[-+]?(\d+(\.\d*)?|\d*\.\d+)([eE][-+]?\d+)?\s*")
-_INT = re.compile(r"\s*[-+]?\d+(?![.eE])\s*")
+# Fortran style real numbers, as in NASTRAN fixed field input, with
+# the exponent introduced by "D" or by its sign only: "1.5D3", "1.5-3".
+_FORTRAN = re.compile(r"\s*([-+]?(?:\d+\.\d*|\.\d+))(?:[dD]([-+]?\d+)|([-+]\d+))\s*$")
+
+# Bits of the token type mask.
+_NUMBER = 1  # token converts to float
+_FLOAT_FORM = 2  # token looks like a plain decimal number
+
+
+def _numpy():
+    """Return the NumPy module, or `None` if it is not installed."""
+    global numpy, _NUMPY_TRIED
+    if not _NUMPY_TRIED:
+        _NUMPY_TRIED = True
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+    return numpy
+
+
+class Comparator(object):
+    """Comparison options resolved once for all lines.
+
+    Regular expressions are compiled and the token splitter is chosen
+    when the comparator is created, `CmpLine` instances only keep a
+    reference to it.
+
+    With `fixcols` all fields of a line are cut by a single
+    `operator.itemgetter` call, and fields in Fortran notation without
+    exponent letter or with "D" exponent are read as numbers.
+
+    >>> comp = Comparator({"fixcols": [2, 5], "aeps": 0.1})
+    >>> comp.split("ab123")
+    ('ab', '123')
+    >>> Comparator({"fixcols": [2, 7]}).parse("ab1.5-3")[2].tolist()
+    [0.0, 0.0015]
+    >>> comp.fequals(1.0, 1.05)
+    True
+    >>> comp.line("ab1.0") == comp.line("ab1.05")
+    True"""
+
+    linesplit = re.compile(r" *, *| +")
+
+    def __init__(self, options=None):
+        if options is None:
+            options = {"fixcols": None}
+        self.options = options
+        self.verbose = bool(options.get("verbose"))
+        self.ignore_space_change = bool(options.get("ignore_space_change"))
+        self.ignore_space = bool(options.get("ignore_space", False))
+        self.ignore = None
+        if options.get("ignore") is not None:
+            self.ignore = re.compile(options["ignore"])
+        self.aeps = options.get("aeps", 1e-8)
+        self.reps = options.get("reps", 1e-5)
+        fixcols = options.get("fixcols")
+        self.fortran = bool(fixcols)
+        if fixcols:
+            self.slices = [slice(i, j) for i, j in zip([0] + fixcols[:-1], fixcols)]
+            if len(self.slices) > 1:
+                self.split = operator.itemgetter(*self.slices)
+            else:
+                self.split = self._fixsplit
+        else:
+            if options.get("splitre"):
+                self.linesplit = re.compile(options["splitre"])
+            self.split = self.linesplit.split
+
+    # Options dictionary, a copy of it, and comparator last created by
+    # `get`.
+    _last = (None, None, None)
+
+    @classmethod
+    def get(cls, options):
+        """Return `options` if it is a `Comparator` already, else a
+        `Comparator` for the options dictionary. The comparator is
+        reused while the same, unchanged dictionary is passed."""
+        if isinstance(options, Comparator):
+            return options
+        last, copy, result = Comparator._last
+        if options is None or options is not last or options != copy:
+            result = cls(options)
+            if options is not None:
+                Comparator._last = (options, dict(options), result)
+        return result
+
+    def _fixsplit(self, line):
+        return tuple(line[i] for i in self.slices)
+
+    def parse(self, line):
+        """Split `line` into tokens, return the tokens, their type mask,
+        and a packed array of their numerical values."""
+        tokens = self.split(line)
+        if self.ignore_space:
+            tokens = [i.strip() for i in tokens]
+        kinds = bytearray(len(tokens))
+        numbers = array("d", bytes(8 * len(tokens)))
+        for i, token in enumerate(tokens):
+            try:
+                numbers[i] = float(token)
+            except ValueError:
+                if self.fortran:
+                    match = _FORTRAN.match(token)
+                    if match is not None:
+                        mantissa, exp1, exp2 = match.groups()
+                        numbers[i] = float("%se%s" % (mantissa, exp1 or exp2))
+                        kinds[i] = _NUMBER | _FLOAT_FORM
+                continue
+            kinds[i] = _NUMBER | (_FLOAT_FORM if _FLOAT.match(token) else 0)
+        return tuple(tokens), bytes(kinds), numbers
+
+    def line(self, line):
+        """Return `CmpLine` for `line` using this comparator."""
+        return CmpLine(line, self)
+
+    def fequals(self, float1, float2):
+        """Check for arguments beeing numerical equal."""
+        return abs(float1 - float2) <= (self.aeps + self.reps * abs(float2))
 
 
 class CmpLine(object):
     """Representing test lines to be compared.
 
     Tries literal comparison of lines first. If this fails, tries
-    numerical comparison.
+    numerical comparison. `options` is a dictionary of the comparison
+    options or a `Comparator`.
 
     >>> a, b, c = CmpLine("AA 1.00000000001"), CmpLine("AA 1"), CmpLine("BB")
     >>> a == c
@@ -33,90 +159,125 @@ class CmpLine(object):
     >>> a == b
     True"""
 
-    linesplit = re.compile(r" *, *| +")
+    # Filled on first use by `_parse` and `skeleton`.
+    _tokens = None
+    _kinds = None
+    _numbers = None
+    _skeleton = None
 
     def __init__(self, line, options=None):
         self.line = line
-        if options is None:
-            self.options = {"fixcols": None}
+        self.comparator = comparator = Comparator.get(options)
+        if comparator.ignore_space_change:
+            self.value = line.strip()
         else:
-            self.options = options
-        self.value = self.line
-        if self.options.get("ignore_space_change"):
-            self.value = self.value.strip()
-        self.ignore = None
-        if self.options.get("ignore") is not None:
-            self.ignore = re.compile(self.options["ignore"])
-        if self.options.get("splitre"):
-            self.linesplit = re.compile(self.options["splitre"])
-        self.aeps = self.options.get("aeps", 1e-8)
-        self.reps = self.options.get("reps", 1e-5)
+            self.value = line
+        self.key = self.value.strip()
+
+    @property
+    def options(self):
+        """The comparison options (property)"""
+        return self.comparator.options
+
+    @property
+    def ignore(self):
+        """Pattern for lines to be ignored, or `None` (property)"""
+        return self.comparator.ignore
+
+    @property
+    def aeps(self):
+        """Absolute tolerance (property)"""
+        return self.comparator.aeps
+
+    @property
+    def reps(self):
+        """Relative tolerance (property)"""
+        return self.comparator.reps
 
     def __eq__(self, other):
-        if self.options.get("verbose"):
-            print("__EQ__ !%s! !%s!" % (self.value.strip(), other.value.strip()))
+        if self.comparator.verbose:
+            return self._verbose_eq(other)
+        if self.key == other.key:
+            return True
+        ignore = self.comparator.ignore
         if (
-            self.ignore is not None
-            and self.ignore.search(self.value)
-            and self.ignore.search(other.value)
+            ignore is not None
+            and ignore.search(self.value)
+            and ignore.search(other.value)
         ):
-            if self.options.get("verbose"):
-                print("IGNORE !%s! !%s!" % (self.value.strip(), other.value.strip()))
             return True
-        elif self.value.strip() == other.value.strip():
-            if self.options.get("verbose"):
-                print("EQUAL !%s! !%s!" % (self.value.strip(), other.value.strip()))
+        if self._tokens is None:
+            self._parse()
+        if other._tokens is None:
+            other._parse()
+        tokens1, tokens2 = self._tokens, other._tokens
+        if len(tokens1) != len(tokens2):
+            return False
+        kinds1, kinds2 = self._kinds, other._kinds
+        numbers1, numbers2 = self._numbers, other._numbers
+        fequals = self.comparator.fequals
+        for i, token1 in enumerate(tokens1):
+            if token1 == tokens2[i]:
+                continue
+            kind1, kind2 = kinds1[i], kinds2[i]
+            if (
+                kind1 & kind2 & _NUMBER
+                and (kind1 | kind2) & _FLOAT_FORM
+                and fequals(numbers1[i], numbers2[i])
+            ):
+                continue
+            return False
+        return True
+
+    def _verbose_eq(self, other):
+        """`__eq__` reporting each step."""
+        print("__EQ__ !%s! !%s!" % (self.key, other.key))
+        ignore = self.comparator.ignore
+        if (
+            ignore is not None
+            and ignore.search(self.value)
+            and ignore.search(other.value)
+        ):
+            print("IGNORE !%s! !%s!" % (self.key, other.key))
             return True
-        else:
-            sLine1 = self.splitline(self.value.strip())
-            sLine2 = self.splitline(other.value.strip())
-            if len(sLine1) != len(sLine2):
-                if self.options.get("verbose"):
-                    print(
-                        "SPLITLEN !%s! !%s!" % (self.value.strip(), other.value.strip())
-                    )
-                return False
-            for token1, token2 in zip(sLine1, sLine2):
-                if self.options.get("verbose"):
-                    print("token1: ", token1, "; token2: ", token2)
-                if self.options.get("ignore_space", False):
-                    token1 = token1.strip()
-                    token2 = token2.strip()
-                if token1 == token2:
-                    continue
-                elif _FLOAT.match(token1) or _FLOAT.match(token2):
-                    if self.options.get("verbose"):
-                        print(
-                            "FLOAT !%s! !%s!"
-                            % (self.value.strip(), other.value.strip())
-                        )
-                    try:
-                        if self.fequals(float(token1), float(token2)):
-                            continue
-                    except ValueError:
-                        if self.options.get("verbose"):
-                            print(
-                                "ValueError !%s! !%s!"
-                                % (self.value.strip(), other.value.strip())
-                            )
-                elif _INT.match(token1) or _INT.match(token2):
-                    if self.options.get("verbose"):
-                        print(
-                            "INT !%s! !%s!" % (self.value.strip(), other.value.strip())
-                        )
-                    if self.fequals(int(token1), int(token2)):
-                        continue
-
-                if self.options.get("verbose"):
-                    print("TOKEN !%s! !%s!" % (self.value.strip(), other.value.strip()))
-                return False
-            if self.options.get("verbose"):
-                print("SAME !%s! !%s!" % (self.value.strip(), other.value.strip()))
+        elif self.key == other.key:
+            print("EQUAL !%s! !%s!" % (self.key, other.key))
             return True
+        if self._tokens is None:
+            self._parse()
+        if other._tokens is None:
+            other._parse()
+        tokens1, tokens2 = self._tokens, other._tokens
+        if len(tokens1) != len(tokens2):
+            print("SPLITLEN !%s! !%s!" % (self.key, other.key))
+            return False
+        kinds1, kinds2 = self._kinds, other._kinds
+        numbers1, numbers2 = self._numbers, other._numbers
+        for i, token1 in enumerate(tokens1):
+            token2 = tokens2[i]
+            print("token1: ", token1, "; token2: ", token2)
+            if token1 == token2:
+                continue
+            kind1, kind2 = kinds1[i], kinds2[i]
+            if kind1 & kind2 & _NUMBER and (kind1 | kind2) & _FLOAT_FORM:
+                print("FLOAT !%s! !%s!" % (self.key, other.key))
+                if self.fequals(numbers1[i], numbers2[i]):
+                    continue
+            print("TOKEN !%s! !%s!" % (self.key, other.key))
+            return False
+        print("SAME !%s! !%s!" % (self.key, other.key))
+        return True
+
+    def _parse(self):
+        """Split the line into tokens and classify them, once.
+
+        Stores the literal tokens, a packed array of their numerical
+        values and a type mask telling which tokens are numbers."""
+        self._tokens, self._kinds, self._numbers = self.comparator.parse(self.key)
 
     def fequals(self, float1, float2):
         """Check for arguments beeing numerical equal."""
-        if self.options.get("verbose"):
+        if self.comparator.verbose:
             print(
                 "fequals: ",
                 float1,
@@ -124,20 +285,11 @@ class CmpLine(object):
                 abs(float1 - float2),
                 (self.aeps + self.reps * abs(float2)),
             )
-
-        return abs(float1 - float2) <= (self.aeps + self.reps * abs(float2))
+        return self.comparator.fequals(float1, float2)
 
     def splitline(self, line):
         """Split line into tokens to be evaluated."""
-        if self.options["fixcols"]:
-            return [
-                line[i:j]
-                for i, j in zip(
-                    [0] + self.options["fixcols"][:-1], self.options["fixcols"]
-                )
-            ]
-        else:
-            return self.linesplit.split(line)
+        return self.comparator.split(line)
 
     def __str__(self):
         return self.line
@@ -151,8 +303,64 @@ class CmpLine(object):
     def __getitem__(self, item):
         return self.value[item]
 
+    def skeleton(self):
+        """Return the key used for hashing.
+
+        Numeric tokens are masked, so all lines that may compare equal
+        within the tolerances share the same key.
+
+        >>> CmpLine("AA 1.00000000001").skeleton() == CmpLine("AA 1").skeleton()
+        True
+        >>> CmpLine("AA 1").skeleton() == CmpLine("BB 1").skeleton()
+        False"""
+        if self._skeleton is None:
+            if self.comparator.ignore is not None:
+                # Ignored lines compare equal to each other, no
+                # structure can be used then.
+                self._skeleton = ()
+            else:
+                if self._tokens is None:
+                    self._parse()
+                self._skeleton = tuple(
+                    None if kind else token
+                    for token, kind in zip(self._tokens, self._kinds)
+                )
+        return self._skeleton
+
     def __hash__(self):
-        return 1
+        return hash(self.skeleton())
+
+
+def rows_equal(lines1, lines2):
+    """Compare two equally long lists of `CmpLine` row by row.
+
+    All numerical tokens of the rows with the same skeleton are checked
+    in one vectorized NumPy operation.  Returns a list of flags, `True`
+    marks rows known to be equal, `False` rows that need the regular
+    comparison.  Returns `None` if NumPy is not available."""
+    if len(lines1) != len(lines2) or _numpy() is None:
+        return None
+    result = [False] * len(lines1)
+    rows = []
+    for i, (line1, line2) in enumerate(zip(lines1, lines2)):
+        if line1.comparator.ignore is None and line1.skeleton() == line2.skeleton():
+            rows.append(i)
+    if not rows:
+        return result
+    starts = numpy.cumsum([0] + [len(lines1[i]._tokens) for i in rows[:-1]])
+    numbers1 = numpy.frombuffer(b"".join(lines1[i]._numbers for i in rows))
+    numbers2 = numpy.frombuffer(b"".join(lines2[i]._numbers for i in rows))
+    kinds1 = numpy.frombuffer(b"".join(lines1[i]._kinds for i in rows), numpy.uint8)
+    kinds2 = numpy.frombuffer(b"".join(lines2[i]._kinds for i in rows), numpy.uint8)
+    aeps, reps = lines1[0].comparator.aeps, lines1[0].comparator.reps
+    with numpy.errstate(invalid="ignore", over="ignore"):
+        ok = numpy.abs(numbers1 - numbers2) <= (aeps + reps * numpy.abs(numbers2))
+    # Literal tokens are equal by the skeleton, numbers are only
+    # compared numerically if one of them looks like a decimal number.
+    ok &= (kinds1 == 0) | (((kinds1 | kinds2) & _FLOAT_FORM) != 0)
+    for i, equal in zip(rows, numpy.logical_and.reduceat(ok, starts)):
+        result[i] = bool(equal)
+    return result
 
 
 # Local Variables:
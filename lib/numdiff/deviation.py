@@ -0,0 +1,258 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Numerical deviations between aligned lines.
+"""
+
+# Standard libraries.
+import bisect
+import math
+
+# Local libraries.
+from .cmpline import _NUMBER, Comparator, _numpy, rows_equal
+
+__date__ = "2026/10/18 20:00:00 hoel"
+__author__ = "Berthold Höllmann"
+__copyright__ = "Copyright © 2026 by DNV GL SE"
+__credits__ = ["Berthold Höllmann"]
+__maintainer__ = "Berthold Höllmann"
+__email__ = "berthold.hoellmann@dnvgl.com"
+
+
+__all__ = ["Deviation"]
+
+
+class Deviation(object):
+    """Largest absolute and relative deviation between the numbers of
+    aligned lines.
+
+    `abs` and `rel` are `None` or tuples of the deviation, the line
+    indices in both files, and the token index in the line. `count` is
+    the number of differing numbers, `columns` maps the token indices
+    to the counts of their relative deviations in the ranges split at
+    `EDGES`. Deviations from 0 count as relative deviations of 1 or
+    more. Indices start at 0, as in the opcodes.
+
+    >>> dev = Deviation.fromlines([('replace', 0, 2, 0, 2)],
+    ...     ['a 1 2', 'b 100'], ['a 1 2.00001', 'b 100.0001'],
+    ...     {'fixcols': None, 'reps': 0})
+    >>> dev.abs[1:], dev.rel[1:]
+    ((1, 1, 1), (0, 0, 2))
+    >>> dev.count, sorted(dev.columns.items())
+    (2, [(1, [0, 0, 1, 0, 0, 0]), (2, [0, 0, 0, 1, 0, 0])])"""
+
+    # Decades splitting the relative deviations for the histogram.
+    DECADES = (-12, -9, -6, -3, 0)
+    EDGES = tuple(10.0 ** i for i in DECADES)
+
+    def __init__(self):
+        self.abs = None
+        self.rel = None
+        self.count = 0
+        self.columns = {}
+
+    @classmethod
+    def fromlines(cls, opcodes, lines1, lines2, options, parsed=None):
+        """Collect the deviations of the lines paired by equally sized
+        `replace` opcodes. `options` is a dictionary of the comparison
+        options or a `Comparator`. Lines paired by `equal` opcodes and
+        pairs equal by the comparison options are left out, `parsed`
+        are two dictionaries of `CmpLine` objects by line index already
+        parsed while aligning. With NumPy the numbers are checked in
+        one vectorized pass.
+
+        >>> Deviation.fromlines([('replace', 0, 2, 0, 2)], ['a 1.0', 'b 1'],
+        ...     ['a 1.000001', 'b 2'], {'fixcols': None}).count
+        1"""
+        line = Comparator.get(options).line
+        parsed1, parsed2 = parsed or ({}, {})
+        pairs = []
+        for tag, i1, i2, j1, j2 in opcodes:
+            if tag != "replace" or i2 - i1 != j2 - j1:
+                continue
+            for i, j in zip(range(i1, i2), range(j1, j2)):
+                if lines1[i] != lines2[j]:
+                    line1 = parsed1.get(i)
+                    if line1 is None:
+                        line1 = line(lines1[i])
+                    line2 = parsed2.get(j)
+                    if line2 is None:
+                        line2 = line(lines2[j])
+                    pairs.append((i, j, line1, line2))
+        flags = rows_equal([i[2] for i in pairs], [i[3] for i in pairs])
+        if flags is not None:
+            pairs = [pair for pair, equal in zip(pairs, flags) if not equal]
+        pairs = [pair for pair in pairs if not pair[2] == pair[3]]
+        result = cls()
+        if _numpy() is None:
+            for pair in pairs:
+                result.add(*pair)
+        else:
+            result.addmany(pairs)
+        return result
+
+    def _bins(self, column):
+        """Return the histogram counts of token index `column`."""
+        bins = self.columns.get(column)
+        if bins is None:
+            bins = self.columns[column] = [0] * (len(self.EDGES) + 1)
+        return bins
+
+    def add(self, i, j, line1, line2):
+        """Take the deviations of `CmpLine` objects `line1` and `line2`
+        at line indices `i` and `j` into account."""
+        for line in (line1, line2):
+            if line._tokens is None:
+                line._parse()
+        if len(line1._tokens) != len(line2._tokens):
+            return
+        kinds1, kinds2 = line1._kinds, line2._kinds
+        numbers1, numbers2 = line1._numbers, line2._numbers
+        for k in range(len(kinds1)):
+            if not kinds1[k] & kinds2[k] & _NUMBER:
+                continue
+            delta = abs(numbers1[k] - numbers2[k])
+            if not delta > 0:
+                # Equal numbers written differently, or NaN.
+                continue
+            if self.abs is None or delta > self.abs[0]:
+                self.abs = (delta, i, j, k)
+            rel = math.inf
+            if numbers2[k]:
+                rel = delta / abs(numbers2[k])
+                if self.rel is None or rel > self.rel[0]:
+                    self.rel = (rel, i, j, k)
+            self.count += 1
+            self._bins(k)[bisect.bisect_right(self.EDGES, rel)] += 1
+
+    def addmany(self, pairs):
+        """Like `add` for a list of `(i, j, line1, line2)` tuples, all
+        numbers are checked in one vectorized NumPy operation."""
+        numpy = _numpy()
+        rows = []
+        for i, j, line1, line2 in pairs:
+            for line in (line1, line2):
+                if line._tokens is None:
+                    line._parse()
+            if line1._tokens and len(line1._tokens) == len(line2._tokens):
+                rows.append((i, j, line1, line2))
+        if not rows:
+            return
+        sizes = numpy.array([len(row[2]._tokens) for row in rows])
+        numbers1 = numpy.frombuffer(b"".join(row[2]._numbers for row in rows))
+        numbers2 = numpy.frombuffer(b"".join(row[3]._numbers for row in rows))
+        kinds1 = numpy.frombuffer(b"".join(row[2]._kinds for row in rows), numpy.uint8)
+        kinds2 = numpy.frombuffer(b"".join(row[3]._kinds for row in rows), numpy.uint8)
+        lines1 = numpy.repeat([row[0] for row in rows], sizes)
+        lines2 = numpy.repeat([row[1] for row in rows], sizes)
+        columns = numpy.arange(len(numbers1)) - numpy.repeat(
+            numpy.cumsum(sizes) - sizes, sizes
+        )
+        with numpy.errstate(invalid="ignore", divide="ignore", over="ignore"):
+            delta = numpy.abs(numbers1 - numbers2)
+            use = ((kinds1 & kinds2 & _NUMBER) != 0) & (delta > 0)
+            if not use.any():
+                return
+            delta, numbers2 = delta[use], numbers2[use]
+            lines1, lines2, columns = lines1[use], lines2[use], columns[use]
+            rel = delta / numpy.abs(numbers2)
+
+        def where(k):
+            return int(lines1[k]), int(lines2[k]), int(columns[k])
+
+        k = int(numpy.argmax(delta))
+        if self.abs is None or delta[k] > self.abs[0]:
+            self.abs = (float(delta[k]),) + where(k)
+        finite = numbers2 != 0
+        if finite.any():
+            k = int(numpy.argmax(numpy.where(finite, rel, -1.0)))
+            if self.rel is None or rel[k] > self.rel[0]:
+                self.rel = (float(rel[k]),) + where(k)
+        self.count += len(delta)
+        nbins = len(self.EDGES) + 1
+        bins = numpy.searchsorted(numpy.array(self.EDGES), rel, side="right")
+        counts = numpy.bincount(
+            columns * nbins + bins, minlength=(columns.max() + 1) * nbins
+        ).reshape(-1, nbins)
+        for column in numpy.nonzero(counts.sum(axis=1))[0]:
+            total = self._bins(int(column))
+            for b, n in enumerate(counts[column].tolist()):
+                total[b] += n
+
+    def summary(self):
+        """Return the deviations as text, with line and column numbers
+        starting at 1.
+
+        >>> dev = Deviation.fromlines([('replace', 0, 2, 0, 2)],
+        ...     ['a 1 2', 'b 100'], ['a 1 2.00001', 'b 100.0001'],
+        ...     {'fixcols': None, 'reps': 0})
+        >>> print(dev.summary())
+        numerical deviations: 2 numbers differ
+          largest absolute 0.0001 in lines 2/2, column 2
+          largest relative 5e-06 in lines 1/1, column 3
+          relative deviations per column:
+          column  <1e-12   <1e-9   <1e-6   <1e-3      <1     >=1
+               2       0       0       1       0       0       0
+               3       0       0       0       1       0       0"""
+        if not self.count:
+            return "numerical deviations: none"
+        out = ["numerical deviations: %d numbers differ" % self.count]
+        for name, val in (("absolute", self.abs), ("relative", self.rel)):
+            if val is not None:
+                out.append(
+                    "  largest %s %.3g in lines %d/%d, column %d"
+                    % (name, val[0], val[1] + 1, val[2] + 1, val[3] + 1)
+                )
+        labels = ["<1e%d" % i if i else "<1" for i in self.DECADES] + [">=1"]
+        out.append("  relative deviations per column:")
+        out.append("  column" + "".join("%8s" % i for i in labels))
+        for column, bins in sorted(self.columns.items()):
+            out.append("  %6d" % (column + 1) + "".join("%8d" % i for i in bins))
+        return "\n".join(out)
+
+    def todict(self):
+        """Return the deviations as dictionary, e.g. for JSON output.
+        Line and token indices start at 0, the histogram is keyed by
+        token index.
+
+        >>> dev = Deviation.fromlines([('replace', 0, 1, 0, 1)], ['a 1'],
+        ...     ['a 2'], {'fixcols': None})
+        >>> dev.todict()['abs']
+        {'value': 1.0, 'i': 0, 'j': 0, 'token_index': 1}"""
+        result = {
+            key: None
+            if val is None
+            else dict(zip(("value", "i", "j", "token_index"), val))
+            for key, val in (("abs", self.abs), ("rel", self.rel))
+        }
+        result["count"] = self.count
+        result["histogram"] = {
+            "%d" % column: bins for column, bins in sorted(self.columns.items())
+        }
+        return result
+
+    @classmethod
+    def fromdict(cls, data):
+        """Reverse of `todict`."""
+        result = cls()
+        for key in ("abs", "rel"):
+            val = data.get(key)
+            if val is not None:
+                setattr(
+                    result,
+                    key,
+                    (float(val["value"]), val["i"], val["j"], val["token_index"]),
+                )
+        result.count = data.get("count", 0)
+        result.columns = {
+            int(column): list(bins)
+            for column, bins in data.get("histogram", {}).items()
+        }
+        return result
+
+
+# Local Variables:
+# mode: python
+# compile-command: "python ../../setup.py test"
+# time-stamp-pattern: "30/__date__ = \"%:y/%02m/%02d %02H:%02M:%02S %u\""
+# End:
@@ -4,6 +4,9 @@
 Class for handling combining difflib.SequenceMatcher result merging.
 """
 
+# Standard libraries.
+from array import array
+
 __date__ = "2022/04/30 19:08:39 hoel"
 __author__ = "Berthold Höllmann"
 __copyright__ = "Copyright © 2012 by Germanischer Lloyd SE, 2019 by DNV GL SE"
@@ -14,12 +17,52 @@ __email__ = "berthold.hoellmann@dnvgl.com"
 
 class DiffList(object):
     """
+Opcodes as returned by `difflib.SequenceMatcher.get_opcodes`, with
+adjacent opcodes of the same kind merged and `replace` opcodes split
+into chunks of at most `maxchunk` lines.
+
+The opcodes are kept in arrays, one for the tags and one for each
+index, not as tuples. Merging with the last opcode is done in place.
+
 >>> b = DiffList(maxchunk=2)
 """
 
+    # Tags known in advance, others are numbered as they show up.
+    TAGS = ("equal", "replace", "delete", "insert")
+
     def __init__(self, maxchunk=20):
-        self.vals = []
         self.maxchunk = maxchunk
+        self.tagnames = list(self.TAGS)
+        self.tagcodes = {tag: i for i, tag in enumerate(self.tagnames)}
+        self._tags = array("B")
+        self._i1 = array("q")
+        self._i2 = array("q")
+        self._j1 = array("q")
+        self._j2 = array("q")
+
+    @property
+    def vals(self):
+        """The opcodes as list of tuples (property)"""
+        return list(self)
+
+    def _code(self, tag):
+        """Return the number stored for `tag`."""
+        code = self.tagcodes.get(tag)
+        if code is None:
+            code = self.tagcodes[tag] = len(self.tagnames)
+            self.tagnames.append(tag)
+        return code
+
+    def _push(self, code, i1, i2, j1, j2):
+        self._tags.append(code)
+        self._i1.append(i1)
+        self._i2.append(i2)
+        self._j1.append(j1)
+        self._j2.append(j2)
+
+    def _pop(self):
+        for column in (self._tags, self._i1, self._i2, self._j1, self._j2):
+            column.pop()
 
     def append(self, val):
         """
@@ -38,20 +81,32 @@ True
 True
 
 """
-        if self.vals and self.vals[-1][0] == val[0]:
-            if self.vals[-1][2] == val[1] and self.vals[-1][4] == val[3]:
-                res = (self.vals[-1][0], self.vals[-1][1],
-                       val[2], self.vals[-1][3], val[4])
-                self.vals = self.vals[:-1]
-            else:
+        tag, i1, i2, j1, j2 = val
+        code = self.tagcodes.get(tag)
+        if code is None:
+            code = self._code(tag)
+        split = tag == 'replace' and self.maxchunk is not None
+        tags = self._tags
+        if tags and tags[-1] == code:
+            if self._i2[-1] != i1 or self._j2[-1] != j1:
                 raise ValueError("Elements do not match: %s %s" %
-                                 (self.vals[-1], val))
-        else:
-            res = val
-        if self.vals and self.vals[0] is None:
-            self.vals = [i for i in self.prepres(*res, maxchunk=self.maxchunk)]
+                                 (self[-1], val))
+            if not split:
+                self._i2[-1] = i2
+                self._j2[-1] = j2
+                return
+            i1, j1 = self._i1[-1], self._j1[-1]
+            self._pop()
+        if split and i2 - i1 > self.maxchunk:
+            for tag, i1, i2, j1, j2 in self.prepres(
+                    tag, i1, i2, j1, j2, maxchunk=self.maxchunk):
+                self._push(self._code(tag), i1, i2, j1, j2)
         else:
-            self.vals.extend(self.prepres(*res, maxchunk=self.maxchunk))
+            tags.append(code)
+            self._i1.append(i1)
+            self._i2.append(i2)
+            self._j1.append(j1)
+            self._j2.append(j2)
 
     @staticmethod
     def prepres(type, ai, aj, bi, bj, maxchunk):
@@ -66,15 +121,44 @@ True
 True
 >>> DiffList.prepres('A', 0, 5, 2, 7, 2) == (('A', 0, 5, 2, 7), )
 True
+
+Blocks of different lengths are split along the diagonal:
+
+>>> DiffList.prepres('replace', 0, 6, 0, 3, 2) == [
+...     ('replace', 0, 2, 0, 1), ('replace', 2, 4, 1, 2),
+...     ('replace', 4, 6, 2, 3)]
+True
+
+Chunks left without lines on one side are deletions or insertions,
+adjacent ones are joined:
+
+>>> DiffList.prepres('replace', 0, 6, 0, 1, 2) == [
+...     ('delete', 0, 4, 0, 0), ('replace', 4, 6, 0, 1)]
+True
 """
         if maxchunk is None or type != 'replace':
             return ((type, ai, aj, bi, bj), )
-        _ai, _aj, _bi, _bj = ai, aj, bi, bj
+        _ai, _bi = ai, bi
         res = []
-        while (_aj - _ai) > maxchunk:
-            res.append((type, _ai, _ai+maxchunk, _bi, _bi+maxchunk),)
-            _ai, _bi = _ai+maxchunk, _bi+maxchunk
-        res.append((type, _ai, _aj, _bi, bj),)
+
+        def add(_ai, _aj, _bi, _bj):
+            if _ai == _aj:
+                tag = 'insert'
+            elif _bi == _bj:
+                tag = 'delete'
+            else:
+                tag = type
+            if res and res[-1][0] == tag != type:
+                res[-1] = (tag, res[-1][1], _aj, res[-1][3], _bj)
+            else:
+                res.append((tag, _ai, _aj, _bi, _bj))
+
+        while (aj - _ai) > maxchunk:
+            _aj = _ai + maxchunk
+            _bj = bi + (_aj - ai) * (bj - bi) // (aj - ai)
+            add(_ai, _aj, _bi, _bj)
+            _ai, _bi = _aj, _bj
+        add(_ai, aj, _bi, bj)
         return res
 
     def extend(self, vals):
@@ -88,7 +172,50 @@ True
 ...         ('equal', 6, 8, 6, 8)]
 True
 """
-        [self.append(i) for i in vals]
+        for i in vals:
+            self.append(i)
+
+    def grouped(self, n=3):
+        """
+Generate groups of opcodes with up to `n` lines of context, like
+`difflib.SequenceMatcher.get_grouped_opcodes`. Tuples are only made
+for the opcodes in the groups, the stored opcodes are not changed.
+
+>>> a = DiffList()
+>>> a.extend([('equal', 0, 10, 0, 10), ('delete', 10, 11, 10, 10),
+...           ('equal', 11, 20, 10, 19), ('insert', 20, 20, 19, 20)])
+>>> for group in a.grouped(1):
+...     print(group)
+[('equal', 9, 10, 9, 10), ('delete', 10, 11, 10, 10), ('equal', 11, 12, 10, 11)]
+[('equal', 19, 20, 18, 19), ('insert', 20, 20, 19, 20)]
+>>> list(DiffList().grouped())
+[]
+"""
+        count = len(self._tags)
+        tags, names = self._tags, self.tagnames
+        starts1, ends1, starts2, ends2 = self._i1, self._i2, self._j1, self._j2
+        equal = self.tagcodes['equal']
+        nn = n + n
+        group = []
+        for k in range(count):
+            code = tags[k]
+            i1, i2, j1, j2 = starts1[k], ends1[k], starts2[k], ends2[k]
+            if code == equal:
+                # Leading and trailing context is cut to `n` lines,
+                # large runs of equal lines end the group.
+                if k == 0:
+                    i1, j1 = max(i1, i2 - n), max(j1, j2 - n)
+                if k == count - 1:
+                    i2, j2 = min(i2, i1 + n), min(j2, j1 + n)
+                if i2 - i1 > nn:
+                    group.append(
+                        ('equal', i1, min(i2, i1 + n), j1, min(j2, j1 + n)))
+                    yield group
+                    group = []
+                    i1, j1 = max(i1, i2 - n), max(j1, j2 - n)
+            group.append((names[code], i1, i2, j1, j2))
+        if group and not (len(group) == 1 and group[0][0] == 'equal'):
+            yield group
 
     def __str__(self):
         """
@@ -106,7 +233,16 @@ True
 >>> a[0] == ('replace', 0, 2, 0, 2)
 True
 """
-        return self.vals[i]
+        if isinstance(i, slice):
+            return [self[k] for k in range(*i.indices(len(self)))]
+        return (self.tagnames[self._tags[i]], self._i1[i], self._i2[i],
+                self._j1[i], self._j2[i])
+
+    def __iter__(self):
+        names = self.tagnames
+        for code, i1, i2, j1, j2 in zip(
+                self._tags, self._i1, self._i2, self._j1, self._j2):
+            yield (names[code], i1, i2, j1, j2)
 
     def __setitem__(self, i, vals):
         """
@@ -117,14 +253,19 @@ True
 ...     ('A', 4, 5, 4, 5)]
 True
 """
-        self.vals[i] = vals
+        tag, i1, i2, j1, j2 = vals
+        self._tags[i] = self._code(tag)
+        self._i1[i] = i1
+        self._i2[i] = i2
+        self._j1[i] = j1
+        self._j2[i] = j2
 
     def __len__(self):
         """
 >>> print(len(DiffList.prepres('replace', 0, 5, 2, 7, 2)))
 3
 """
-        return len(self.vals)
+        return len(self._tags)
 
 # Local Variables:
 # mode: python
@@ -5,7 +5,11 @@ File identifier for numdiff.
 """
 
 # Standard libraries.
+import os
 import os.path
+import stat
+
+from .reader import SUFFIXES, compression
 
 __date__ = "2022/04/30 19:09:08 hoel"
 __author__ = "Berthold Höllmann"
@@ -15,15 +19,24 @@ __maintainer__ = "Berthold Höllmann"
 __email__ = "berthold.hoellmann@dnvgl.com"
 
 
-__all__ = ["fileFactory", "RegularFile", "Directory"]
+__all__ = [
+    "fileFactory",
+    "scantree",
+    "samecontent",
+    "counterpart",
+    "RegularFile",
+    "CompressedFile",
+    "Directory",
+]
 
 
 class NumDiffFileObject(object):
     """Base class for representing different file kinds."""
 
-    def __init__(self, path, base):
+    def __init__(self, path, base, size=None):
         self.path = path
         self.base = base
+        self.size = size
 
     @property
     def name(self):
@@ -51,6 +64,31 @@ class EmptyFile(RegularFile):
         return "%s is a regular empty file" % os.path.join(self.base, self.path)
 
 
+class CompressedFile(RegularFile):
+    """Regular file with contents compressed by `compression`.
+
+    >>> a = CompressedFile('2.gz', '1', 10, 'gzip')
+    >>> ('%s' % a) == ('%s is a gzip compressed file' % os.path.join('1', '2.gz'))
+    True
+    >>> a.plain
+    '2'"""
+
+    def __init__(self, path, base, size=None, compression=None):
+        super().__init__(path, base, size)
+        self.compression = compression
+
+    def __str__(self):
+        return "%s is a %s compressed file" % (
+            os.path.join(self.base, self.path),
+            self.compression,
+        )
+
+    @property
+    def plain(self):
+        """Path without the compression suffix (property)"""
+        return os.path.splitext(self.path)[0]
+
+
 class Directory(NumDiffFileObject):
     """
     >>> a = Directory('2', '1')
@@ -61,21 +99,97 @@ class Directory(NumDiffFileObject):
         return "%s is a directory" % os.path.join(self.base, self.path)
 
 
-def fileFactory(path, base):
+def fileFactory(path, base, statinfo=None):
     """Factory method for generating apropriate instances of the
-    different subclasses of `NumDiffFileObject`.
+    different subclasses of `NumDiffFileObject`. `statinfo` is the
+    result of `os.stat` for the file, if already known. Files named
+    with a compression suffix are checked for being compressed by
+    their first bytes.
 
     >>> print('%s' % fileFactory('Makefile', ''))
     Makefile is a regular file
     >>> print('%s' % fileFactory('.', ''))
     . is a directory"""
-    fname = os.path.join(base, path)
-    statinfo = os.stat(fname)
-    if os.path.isdir(fname):
-        return Directory(path, base)
+    if statinfo is None:
+        statinfo = os.stat(os.path.join(base, path))
+    if stat.S_ISDIR(statinfo.st_mode):
+        return Directory(path, base, statinfo.st_size)
     elif statinfo.st_size == 0:
-        return EmptyFile(path, base)
-    return RegularFile(path, base)
+        return EmptyFile(path, base, 0)
+    elif path.endswith(SUFFIXES) and stat.S_ISREG(statinfo.st_mode):
+        try:
+            kind = compression(os.path.join(base, path))
+        except OSError:
+            kind = None
+        if kind is not None:
+            return CompressedFile(path, base, statinfo.st_size, kind)
+    return RegularFile(path, base, statinfo.st_size)
+
+
+def scantree(top, exclude=None):
+    """Walk the directory tree `top` once using `os.scandir`.
+
+    Returns a dictionary mapping the paths relative to `top` to
+    `NumDiffFileObject` instances. Entries with names matching
+    `exclude` are skipped, excluded directories are not entered.
+    Symbolic links to directories are reported but not followed.
+
+    >>> tree = scantree('.', lambda name: name != 'Makefile')
+    >>> print('%s' % tree['Makefile'])
+    ./Makefile is a regular file"""
+    result = {}
+    stack = [""]
+    while stack:
+        rel = stack.pop()
+        try:
+            entries = os.scandir(os.path.join(top, rel))
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                if exclude is not None and exclude(entry.name):
+                    continue
+                path = os.path.join(rel, entry.name) if rel else entry.name
+                result[path] = fileFactory(path, top, entry.stat())
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(path)
+    return result
+
+
+def samecontent(fname1, fname2, bufsize=1 << 20):
+    """Return whether two regular files have the same size and
+    contents. Other files, like named pipes, are never read here, they
+    could be read only once.
+
+    >>> samecontent('Makefile', 'Makefile')
+    True"""
+    stat1, stat2 = os.stat(fname1), os.stat(fname2)
+    if not (stat.S_ISREG(stat1.st_mode) and stat.S_ISREG(stat2.st_mode)):
+        return False
+    if stat1.st_size != stat2.st_size:
+        return False
+    with open(fname1, "rb") as fobj1, open(fname2, "rb") as fobj2:
+        while True:
+            data = fobj1.read(bufsize)
+            if data != fobj2.read(bufsize):
+                return False
+            if not data:
+                return True
+
+
+def counterpart(fname):
+    """Return the name of an existing file `fname` is the compressed
+    or uncompressed version of, `fname` if there is none.
+
+    >>> counterpart('no such file')
+    'no such file'"""
+    root, ext = os.path.splitext(fname)
+    candidates = [root] if ext in SUFFIXES else []
+    candidates.extend(fname + i for i in SUFFIXES)
+    for name in candidates:
+        if os.path.isfile(name):
+            return name
+    return fname
 
 
 # Local Variables:
@@ -0,0 +1,325 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Reading input files for numdiff through memory maps.
+
+Compressed files are recognized by their first bytes and decompressed
+while reading: gzip and xz, and zstd with Python 3.14 or the
+`zstandard` package installed.
+"""
+
+# Standard libraries.
+import collections
+import io
+import mmap
+import os
+import re
+import stat
+
+__date__ = "2026/10/18 10:00:00 hoel"
+__author__ = "Berthold Höllmann"
+__copyright__ = "Copyright © 2026 by DNV GL SE"
+__credits__ = ["Berthold Höllmann"]
+__maintainer__ = "Berthold Höllmann"
+__email__ = "berthold.hoellmann@dnvgl.com"
+
+
+__all__ = [
+    "MappedFile",
+    "Prefetcher",
+    "PREFETCH",
+    "compression",
+    "decompress",
+    "SUFFIXES",
+]
+
+# Magic bytes at the start of compressed files, and the compression.
+MAGIC = ((b"\x1f\x8b", "gzip"), (b"\xfd7zXZ\x00", "xz"), (b"\x28\xb5\x2f\xfd", "zstd"))
+# File name extensions of compressed files.
+SUFFIXES = (".gz", ".xz", ".zst")
+
+# Line boundaries recognized by `str.splitlines` besides "\n" and "\r\n".
+_SEPARATORS = re.compile(
+    b"\\r(?!\\n)|[\\x0b\\x0c\\x1c-\\x1e]|\\xc2\\x85|\\xe2\\x80[\\xa8\\xa9]"
+)
+_WS = re.compile(r"\s+")
+
+# Escapes and inline flags in `-I` patterns. Escaped letters other
+# than these, e.g. "\s" or "\u", and inline flags may match
+# differently or be invalid for bytes patterns.
+_ESCAPES = re.compile(r"\\(.)|\(\?[aiLmsux-]", re.DOTALL)
+_SAFE_ESCAPES = frozenset("0123456789AbBdDwWZafnrtvx")
+
+
+def _bytessearch(pattern):
+    """Return the `search` method of `pattern` compiled for bytes, if
+    it matches pure ASCII lines like the `str` pattern does, else
+    `None`.
+
+    >>> _bytessearch(r'REV\\d+')(b'REV17') is not None
+    True
+    >>> _bytessearch(r'\\u00e4') is None, _bytessearch('(?i)rev') is None
+    (True, True)"""
+    if not pattern.isascii():
+        return None
+    for match in _ESCAPES.finditer(pattern):
+        char = match.group(1)
+        if char is None or (char.isalnum() and char not in _SAFE_ESCAPES):
+            return None
+    try:
+        return re.compile(pattern.encode("ascii")).search
+    except re.error:
+        return None
+
+
+def _compression(head):
+    """Return the compression of data starting with `head`."""
+    for magic, name in MAGIC:
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def _readhead(fobj, size=6):
+    """Return the first `size` bytes of `fobj`, fewer only at the end
+    of the file. Pipes may return less data per read."""
+    head = b""
+    while len(head) < size:
+        data = fobj.read(size - len(head))
+        if not data:
+            break
+        head += data
+    return head
+
+
+class _Prepended(io.RawIOBase):
+    """Binary stream of the bytes `head` followed by the data of file
+    object `fobj`, for pipes that cannot seek back after reading their
+    first bytes."""
+
+    def __init__(self, head, fobj):
+        self.head = head
+        self.fobj = fobj
+        self.name = fobj.name
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self.head:
+            size = min(len(buffer), len(self.head))
+            buffer[:size] = self.head[:size]
+            self.head = self.head[size:]
+            return size
+        data = self.fobj.read1(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+
+def compression(fname):
+    """Return the compression of file `fname` found from its first
+    bytes, "gzip", "xz", "zstd", or `None` for other files.
+
+    >>> compression('Makefile') is None
+    True"""
+    with open(fname, "rb") as fobj:
+        return _compression(_readhead(fobj))
+
+
+def decompress(fobj, kind, bufsize=1 << 20):
+    """Return a binary file object reading the data of `fobj`
+    decompressed, with compression `kind` as from `compression`. Lines
+    are split from the decompressed data in chunks of `bufsize` bytes
+    by `io.BufferedReader`, not one by one by the decompressor."""
+    if kind == "gzip":
+        import gzip
+
+        source = gzip.GzipFile(fileobj=fobj, mode="rb")
+    elif kind == "xz":
+        import lzma
+
+        source = lzma.LZMAFile(fobj)
+    else:
+        try:
+            from compression import zstd
+
+            source = zstd.ZstdFile(fobj)
+        except ImportError:
+            try:
+                import zstandard
+            except ImportError:
+                raise OSError(
+                    "'%s' is zstd compressed, reading it needs the zstandard "
+                    "package" % fobj.name
+                )
+            source = zstandard.ZstdDecompressor().stream_reader(
+                fobj, read_across_frames=True
+            )
+    return io.BufferedReader(source, bufsize)
+
+
+def _splitlines(source):
+    """Yield the lines from the binary file object `source`, split
+    like `str.splitlines` does."""
+    for line in source:
+        if _SEPARATORS.search(line):
+            for part in line.decode("utf-8", "replace").splitlines():
+                yield part.encode("utf-8")
+        else:
+            yield line
+
+
+class MappedFile(object):
+    """Lines of a text file to be compared.
+
+    The file is memory mapped and split into lines on bytes. Comment
+    lines and lines matching `ignore` are dropped before decoding.
+    Pure ASCII lines are decoded as ASCII, only other lines are decoded
+    as UTF-8. The lines are returned stripped, with `ignore_space`
+    runs of white space are reduced to a single blank.
+
+    Files that cannot be mapped, like pipes or empty files, are read
+    the usual way, compressed files are decompressed while reading."""
+
+    def __init__(self, fname, cchars=None, ignore=None, ignore_space=False):
+        self.fname = fname
+        self.cchars = cchars.encode("utf-8") if cchars else None
+        self.ignore = self.bignore = None
+        if ignore:
+            self.ignore = re.compile(ignore).search
+            self.bignore = _bytessearch(ignore)
+        self.ignore_space = ignore_space
+
+    def rawlines(self):
+        """Yield the lines of the file as bytes, including the line
+        end. Lines are split like `str.splitlines` does."""
+        with open(self.fname, "rb") as fobj:
+            head = _readhead(fobj)
+            if fobj.seekable():
+                fobj.seek(0)
+            else:
+                fobj = io.BufferedReader(_Prepended(head, fobj))
+            kind = _compression(head)
+            if kind is not None:
+                with decompress(fobj, kind) as source:
+                    yield from _splitlines(source)
+                return
+            try:
+                data = mmap.mmap(fobj.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, OSError):
+                data = None
+            try:
+                source = fobj if data is None else iter(data.readline, b"")
+                yield from _splitlines(source)
+            finally:
+                if data is not None:
+                    data.close()
+
+    def __iter__(self):
+        cchars, ignore, bignore = self.cchars, self.ignore, self.bignore
+        for line in self.rawlines():
+            if cchars is not None and line.startswith(cchars):
+                continue
+            # "\x1f" is whitespace for `str` but not for `bytes`,
+            # "\x1c" to "\x1e" already ended the line.
+            if line.isascii() and b"\x1f" not in line:
+                if bignore is not None:
+                    if bignore(line):
+                        continue
+                elif ignore is not None and ignore(line.decode("ascii")):
+                    continue
+                if self.ignore_space:
+                    yield b" ".join(line.split()).decode("ascii")
+                else:
+                    yield line.strip().decode("ascii")
+            else:
+                text = line.decode("utf-8", "replace")
+                if ignore is not None and ignore(text):
+                    continue
+                if self.ignore_space:
+                    text = " ".join(_WS.split(text.strip()))
+                yield text.strip()
+
+
+class Prefetcher(object):
+    """Read files into the operating system's page cache on a
+    background thread, while the calling thread works on other files.
+
+    Reading is done in chunks of `bufsize` bytes into a buffer that is
+    reused, the GIL is released while waiting for the data. Only
+    regular files are read, pipes must be left to the comparison. Files
+    read recently, and not changed since, are skipped.
+
+    >>> prefetch = Prefetcher()
+    >>> prefetch('Makefile', 'no such file')
+    >>> prefetch.join()"""
+
+    def __init__(self, bufsize=1 << 20, recent=16):
+        self.bufsize = bufsize
+        self.recent = collections.deque(maxlen=recent)
+        self.queue = None
+        self.pid = None
+
+    def __call__(self, *fnames):
+        """Queue files `fnames` for reading."""
+        if self.pid != os.getpid():
+            # Not started yet, or in a forked pool worker where the
+            # thread of the parent does not exist.
+            self.start()
+        for fname in fnames:
+            self.queue.put(fname)
+
+    def start(self):
+        """Start the reading thread."""
+        import queue
+        import threading
+
+        self.queue = queue.Queue()
+        self.pid = os.getpid()
+        threading.Thread(
+            target=self.run, args=(self.queue,), name="numdiff-prefetch", daemon=True
+        ).start()
+
+    def join(self):
+        """Wait until all queued files are read."""
+        if self.queue is not None and self.pid == os.getpid():
+            self.queue.join()
+
+    def run(self, queue):
+        """Read the files from `queue`."""
+        buf = bytearray(self.bufsize)
+        while True:
+            fname = queue.get()
+            try:
+                self.read(fname, buf)
+            except OSError:
+                # Reported by the comparison, if it matters.
+                pass
+            finally:
+                queue.task_done()
+
+    def read(self, fname, buf):
+        """Read file `fname` into `buf`, chunk by chunk."""
+        info = os.stat(fname)
+        if not stat.S_ISREG(info.st_mode):
+            return
+        key = (fname, info.st_size, info.st_mtime_ns)
+        if key in self.recent:
+            return
+        self.recent.append(key)
+        with open(fname, "rb", buffering=0) as fobj:
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(fobj.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+            while fobj.readinto(buf):
+                pass
+
+
+# Prefetcher of this process.
+PREFETCH = Prefetcher()
+
+
+# Local Variables:
+# mode: python
+# compile-command: "python ../../setup.py test"
+# time-stamp-pattern: "30/__date__ = \"%:y/%02m/%02d %02H:%02M:%02S %u\""
+# End:
@@ -0,0 +1,310 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Comparison results and their output formats.
+"""
+
+# Standard libraries.
+import json
+import math
+import os.path
+import re
+import sys
+
+__date__ = "2026/10/18 13:00:00 hoel"
+__author__ = "Berthold Höllmann"
+__copyright__ = "Copyright © 2026 by DNV GL SE"
+__credits__ = ["Berthold Höllmann"]
+__maintainer__ = "Berthold Höllmann"
+__email__ = "berthold.hoellmann@dnvgl.com"
+
+
+__all__ = [
+    "Result",
+    "TextReport",
+    "JsonLinesReport",
+    "JUnitReport",
+    "CollectReport",
+    "REPORTS",
+]
+
+
+class Result(object):
+    """Outcome of comparing two files.
+
+    `opcodes` are the `(tag, i1, i2, j1, j2)` tuples aligning the
+    compared lines, `diff` is the rendered context diff, `None` if it
+    was not kept. `deviation` is a `Deviation` instance or `None`.
+    `verdict` is "differ" or "equal", unless given otherwise.
+
+    >>> Result('a', 'b', True).verdict
+    'differ'"""
+
+    def __init__(
+        self,
+        file1,
+        file2,
+        differ,
+        diff="",
+        opcodes=(),
+        deviation=None,
+        seconds=0.0,
+        verdict=None,
+    ):
+        self.file1 = file1
+        self.file2 = file2
+        self.differ = differ
+        self.diff = diff
+        self.opcodes = list(opcodes)
+        self.deviation = deviation
+        self.seconds = seconds
+        self._verdict = verdict
+
+    def __repr__(self):
+        return "<Result %s %r %r>" % (self.verdict, self.file1, self.file2)
+
+    @property
+    def verdict(self):
+        """Outcome of the comparison as string (property)"""
+        if self._verdict is not None:
+            return self._verdict
+        return "differ" if self.differ else "equal"
+
+    @property
+    def hunks(self):
+        """The opcodes for differing lines (property)"""
+        return [i for i in self.opcodes if i[0] != "equal"]
+
+    def todict(self):
+        """Return the result as dictionary, e.g. for JSON output."""
+        return {
+            "file1": self.file1,
+            "file2": self.file2,
+            "verdict": self.verdict,
+            "hunks": [list(i) for i in self.hunks],
+            "deviation": None if self.deviation is None else self.deviation.todict(),
+            "seconds": self.seconds,
+        }
+
+
+class TextReport(object):
+    """Human readable output, as from the diff utility. With `summary`
+    the numerical deviations of differing files are reported too."""
+
+    # Does the report need the numerical deviations?
+    details = False
+
+    def __init__(self, brief=False, summary=False):
+        self.brief = brief
+        self.summary = summary
+        if summary:
+            self.details = True
+
+    def summarytext(self, result):
+        """Return the deviation summary to report for `result`, or an
+        empty string."""
+        if not self.summary or not result.differ or result.deviation is None:
+            return ""
+        return result.deviation.summary()
+
+    def start(self):
+        """Called before the first comparison."""
+        pass
+
+    def finish(self):
+        """Called after the last comparison."""
+        pass
+
+    def comparing(self, file1, file2):
+        """Announce comparison of two files."""
+        print("comparing '%s' and '%s'" % (file1, file2))
+
+    def onlyin(self, base, name):
+        """Report entry `name` only found in directory `base`."""
+        print("Only in %s: %s." % (base, name))
+
+    def mismatch(self, obj1, obj2):
+        """Report directory entries of different kinds."""
+        print("File %s while file %s" % (obj1, obj2))
+
+    def result(self, result):
+        """Report the `Result` of comparing two files."""
+        if result.differ:
+            if self.brief:
+                print("Files %s and %s differ" % (result.file1, result.file2))
+            elif result.diff is not None:
+                print(result.diff)
+            summary = self.summarytext(result)
+            if summary:
+                print(summary)
+
+
+def _jsonsafe(data):
+    """Return `data` with the non-finite floats replaced by the
+    strings "inf", "-inf", and "nan", which JSON cannot represent.
+
+    >>> _jsonsafe({'a': [1.5, float('inf')], 'b': float('nan')})
+    {'a': [1.5, 'inf'], 'b': 'nan'}"""
+    if isinstance(data, float):
+        return data if math.isfinite(data) else repr(data)
+    if isinstance(data, dict):
+        return {key: _jsonsafe(val) for key, val in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [_jsonsafe(i) for i in data]
+    return data
+
+
+class JsonLinesReport(TextReport):
+    """One JSON record per compared pair and line. Infinite and NaN
+    numbers are written as strings.
+
+    >>> JsonLinesReport().onlyin('', 'entry1')
+    {"file1": "entry1", "file2": null, "verdict": "only"}"""
+
+    details = True
+
+    def comparing(self, file1, file2):
+        pass
+
+    def write(self, record):
+        """Output one record."""
+        print(json.dumps(_jsonsafe(record), allow_nan=False))
+        sys.stdout.flush()
+
+    def onlyin(self, base, name):
+        self.write(
+            {"file1": os.path.join(base, name), "file2": None, "verdict": "only"}
+        )
+
+    def mismatch(self, obj1, obj2):
+        self.write(
+            {
+                "file1": obj1.name,
+                "file2": obj2.name,
+                "verdict": "mismatch",
+                "message": "File %s while file %s" % (obj1, obj2),
+            }
+        )
+
+    def result(self, result):
+        self.write(result.todict())
+
+
+# Characters not allowed in XML 1.0 documents, not even escaped.
+_XMLINVALID = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _xmlsafe(text):
+    """Return `text` with the control characters XML cannot hold
+    written as Python escapes.
+
+    >>> _xmlsafe('x 1\\x01')
+    'x 1\\\\x01'"""
+    return _XMLINVALID.sub(lambda match: "\\x%02x" % ord(match.group()), text)
+
+
+class JUnitReport(TextReport):
+    """JUnit XML test report, one test case per compared pair.
+
+    The test cases are written as the comparisons finish."""
+
+    details = True
+
+    def start(self):
+        print('<?xml version="1.0" encoding="utf-8"?>')
+        print('<testsuite name="numdiff">')
+
+    def finish(self):
+        print("</testsuite>")
+
+    def comparing(self, file1, file2):
+        pass
+
+    def write(self, name, seconds=0.0, failure=None, text=""):
+        """Output one test case."""
+        # Imported here, it is slow to import and rarely used.
+        from xml.sax.saxutils import escape, quoteattr
+
+        name, text = _xmlsafe(name), _xmlsafe(text)
+        out = '  <testcase classname="numdiff" name=%s time="%.6f"' % (
+            quoteattr(name),
+            seconds,
+        )
+        if failure is None:
+            print(out + "/>")
+        else:
+            print(out + ">")
+            print(
+                "    <failure message=%s>%s</failure>"
+                % (quoteattr(_xmlsafe(failure)), escape(text))
+            )
+            print("  </testcase>")
+        sys.stdout.flush()
+
+    def onlyin(self, base, name):
+        self.write(
+            os.path.join(base, name), failure="Only in %s: %s." % (base, name)
+        )
+
+    def mismatch(self, obj1, obj2):
+        self.write(
+            "%s : %s" % (obj1.name, obj2.name),
+            failure="File %s while file %s" % (obj1, obj2),
+        )
+
+    def result(self, result):
+        self.write(
+            "%s : %s" % (result.file1, result.file2),
+            result.seconds,
+            "Files differ" if result.differ else None,
+            "\n".join(i for i in (result.diff, self.summarytext(result)) if i),
+        )
+
+
+class CollectReport(TextReport):
+    """Keep the results in the list `results` instead of printing."""
+
+    details = True
+
+    def __init__(self, brief=False, summary=False):
+        TextReport.__init__(self, brief, summary)
+        self.results = []
+
+    def comparing(self, file1, file2):
+        pass
+
+    def onlyin(self, base, name):
+        self.results.append(
+            Result(
+                os.path.join(base, name),
+                None,
+                True,
+                "Only in %s: %s." % (base, name),
+                verdict="only",
+            )
+        )
+
+    def mismatch(self, obj1, obj2):
+        self.results.append(
+            Result(
+                obj1.name,
+                obj2.name,
+                True,
+                "File %s while file %s" % (obj1, obj2),
+                verdict="mismatch",
+            )
+        )
+
+    def result(self, result):
+        self.results.append(result)
+
+
+# Output formats for the `--format` option.
+REPORTS = {"text": TextReport, "jsonl": JsonLinesReport, "junit": JUnitReport}
+
+
+# Local Variables:
+# mode: python
+# compile-command: "python ../../setup.py test"
+# time-stamp-pattern: "30/__date__ = \"%:y/%02m/%02d %02H:%02M:%02S %u\""
+# End:
@@ -0,0 +1,358 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Running numdiff as server on a Unix domain socket.
+
+The server runs the requests one after the other in a single process,
+keeping imported modules, process pools, and cache connections between
+them. Clients send their command line arguments and working directory,
+the server sends back the output and the exit status.
+
+Messages are frames of a one byte channel code, the length of the data
+as four byte unsigned integer in network byte order, and the data:
+
+- "a": request, JSON object with "argv", "cwd", and "package", the
+  directory of the client's numdiff package;
+- "o", "e": output for standard output and standard error;
+- "x": exit status as decimal number, the last frame;
+- "r": the request is refused, the client runs it itself.
+"""
+
+# Standard libraries. Only modules needed by the client are imported
+# here, to keep its start up short.
+import io
+import json
+import os
+import socket
+import stat
+import struct
+import sys
+
+__date__ = "2026/10/18 16:00:00 hoel"
+__author__ = "Berthold Höllmann"
+__copyright__ = "Copyright © 2026 by DNV GL SE"
+__credits__ = ["Berthold Höllmann"]
+__maintainer__ = "Berthold Höllmann"
+__email__ = "berthold.hoellmann@dnvgl.com"
+
+
+__all__ = ["socketpath", "forward", "Server", "main"]
+
+_HEADER = struct.Struct("!cI")
+
+# Package directory, requests from other installations are refused.
+_PACKAGE = os.path.dirname(os.path.abspath(__file__))
+
+
+class _Shutdown(BaseException):
+    """Raised by the SIGTERM handler, passes by all handlers for
+    errors of single requests."""
+
+
+def socketpath(path=None):
+    """Return the socket to use: `path` if given, else the value of
+    the environment variable `NUMDIFF_SOCKET`, else "numdiff.sock" in
+    `$XDG_RUNTIME_DIR`, else in a directory for the current user in
+    `$TMPDIR` or "/tmp", created by the server accessible only by the
+    user. An empty value disables the server."""
+    if path is not None:
+        return path
+    if "NUMDIFF_SOCKET" in os.environ:
+        return os.environ["NUMDIFF_SOCKET"]
+    if os.environ.get("XDG_RUNTIME_DIR"):
+        return os.path.join(os.environ["XDG_RUNTIME_DIR"], "numdiff.sock")
+    uid = os.getuid() if hasattr(os, "getuid") else 0
+    tmpdir = os.environ.get("TMPDIR") or "/tmp"
+    return os.path.join(tmpdir, "numdiff-%d" % uid, "numdiff.sock")
+
+
+def _private(path):
+    """Return whether `path` is a socket owned by the current user and
+    not accessible by others, i.e. belongs to a server run by the
+    user."""
+    try:
+        info = os.lstat(path)
+    except OSError:
+        return False
+    return (
+        stat.S_ISSOCK(info.st_mode)
+        and info.st_uid == os.getuid()
+        and not info.st_mode & 0o077
+    )
+
+
+def _send(sock, channel, data):
+    sock.sendall(_HEADER.pack(channel, len(data)) + data)
+
+
+def _recv(fobj):
+    """Return channel and data of the next frame read from `fobj`, or
+    `None, None` at the end of input."""
+    header = fobj.read(_HEADER.size)
+    if len(header) < _HEADER.size:
+        return None, None
+    channel, size = _HEADER.unpack(header)
+    return channel, fobj.read(size)
+
+
+class _Output(object):
+    """Output of one request, kept in order for both channels and sent
+    in large frames."""
+
+    def __init__(self, sock, bufsize=1 << 16):
+        self.sock = sock
+        self.bufsize = bufsize
+        self.pending = []
+        self.size = 0
+        self.stdout = _Channel(self, b"o")
+        self.stderr = _Channel(self, b"e")
+
+    def write(self, channel, text):
+        if self.pending and self.pending[-1][0] != channel:
+            self.flush()
+        self.pending.append((channel, text))
+        self.size += len(text)
+        if self.size >= self.bufsize:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            data = "".join(i[1] for i in self.pending).encode("utf-8", "replace")
+            _send(self.sock, self.pending[0][0], data)
+            self.pending = []
+            self.size = 0
+
+
+class _Channel(io.TextIOBase):
+    """Text stream writing to one channel of an `_Output`."""
+
+    def __init__(self, output, channel):
+        self.output = output
+        self.channel = channel
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        self.output.write(self.channel, text)
+        return len(text)
+
+    def flush(self):
+        self.output.flush()
+
+
+# Files naming the open files of the process opening them, e.g. from
+# process substitution, the server would open its own.
+_PROCESSFILES = ("/dev/stdin", "/dev/fd", "/proc/self", "/proc/thread-self")
+
+
+def _processlocal(argv):
+    """Return whether any argument in `argv`, or value of a long
+    option, is a file of the process opening it.
+
+    >>> _processlocal(['a.txt', '/dev/fd/63']), _processlocal(['a', 'b'])
+    (True, False)
+    >>> _processlocal(['--exclude=/proc/self/fd/0', '/tmp/../dev/stdin'])
+    True"""
+    for arg in argv:
+        names = [arg]
+        if arg.startswith("--"):
+            names.append(arg.partition("=")[2])
+        for name in map(os.path.abspath, filter(None, names)):
+            if any(name == i or name.startswith(i + "/") for i in _PROCESSFILES):
+                return True
+    return False
+
+
+def forward(argv, path=None):
+    """Have the server at socket `path` run numdiff with command line
+    arguments `argv`, copying its output. Returns the exit status, or
+    `None` if no server could be used, or `argv` names files the
+    server would not open as the client does."""
+    path = socketpath(path)
+    if not path or not hasattr(socket, "AF_UNIX") or not _private(path):
+        return None
+    if _processlocal(argv):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        try:
+            sock.connect(path)
+        except OSError:
+            return None
+        request = dict(argv=list(argv), cwd=os.getcwd(), package=_PACKAGE)
+        _send(sock, b"a", json.dumps(request).encode("utf-8"))
+        fobj = sock.makefile("rb")
+        while True:
+            channel, data = _recv(fobj)
+            if channel is None or channel == b"r":
+                # Server went away or refused the request.
+                return None
+            elif channel == b"x":
+                return int(data)
+            out = sys.stdout if channel == b"o" else sys.stderr
+            out.write(data.decode("utf-8"))
+            out.flush()
+    finally:
+        sock.close()
+
+
+class Server(object):
+    """numdiff server listening on Unix domain socket `path`."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def serve_forever(self):
+        """Answer requests until interrupted. The socket is created
+        accessible only by the user, in a new directory accessible
+        only by the user if its directory does not exist."""
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.isdir(directory):
+            os.mkdir(directory, 0o700)
+        if os.path.exists(self.path):
+            if self._alive():
+                raise RuntimeError("server already running on '%s'" % self.path)
+            # Left behind by a server not shut down cleanly.
+            os.unlink(self.path)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            umask = os.umask(0o177)
+            try:
+                sock.bind(self.path)
+            finally:
+                os.umask(umask)
+            sock.listen(16)
+            while True:
+                conn, _ = sock.accept()
+                with conn:
+                    try:
+                        self.handle(conn)
+                    except OSError:
+                        # Client went away.
+                        pass
+        finally:
+            sock.close()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+    def _alive(self):
+        """Return whether a server answers on the socket."""
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.path)
+        except OSError:
+            return False
+        finally:
+            sock.close()
+        return True
+
+    def handle(self, conn):
+        """Answer one request read from connection `conn`."""
+        import contextlib
+
+        channel, data = _recv(conn.makefile("rb"))
+        if channel != b"a":
+            return
+        request = _request(data)
+        if request is None or request["package"] != _PACKAGE:
+            _send(conn, b"r", b"")
+            return
+        output = _Output(conn)
+        cwd = os.getcwd()
+        try:
+            try:
+                os.chdir(request["cwd"])
+            except OSError:
+                _send(conn, b"r", b"")
+                return
+            with contextlib.redirect_stdout(output.stdout):
+                with contextlib.redirect_stderr(output.stderr):
+                    status = self.run(request["argv"])
+        finally:
+            os.chdir(cwd)
+        output.flush()
+        _send(conn, b"x", b"%d" % status)
+
+    @staticmethod
+    def run(argv):
+        """Run numdiff with command line `argv`, return the exit
+        status."""
+        import traceback
+
+        from . import Main
+
+        try:
+            prog = Main()
+            prog.persistent = True
+            return prog(argv)
+        except _Shutdown:
+            raise
+        except SystemExit as exc:
+            return _exitstatus(exc.code)
+        except Exception:
+            traceback.print_exc()
+            return 1
+
+
+def _request(data):
+    """Return the request decoded from frame `data`, `None` if it is
+    malformed."""
+    try:
+        request = json.loads(data.decode("utf-8"))
+    except ValueError:
+        return None
+    if not (
+        isinstance(request, dict)
+        and isinstance(request.get("argv"), list)
+        and all(isinstance(i, str) for i in request["argv"])
+        and isinstance(request.get("cwd"), str)
+    ):
+        return None
+    request.setdefault("package", None)
+    return request
+
+
+def _terminate(*args):
+    raise _Shutdown()
+
+
+def _exitstatus(code):
+    """Return the process exit status for the `SystemExit` `code`."""
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
+
+
+def main(argv):
+    """Run the server for the `--serve` command line `argv`."""
+    import argparse
+    import signal
+
+    parser = argparse.ArgumentParser(prog="numdiff --serve")
+    parser.add_argument("--serve", action="store_true")
+    parser.add_argument("--socket", default=None, metavar="PATH")
+    args = parser.parse_args(argv)
+    if not hasattr(socket, "AF_UNIX"):
+        parser.error("Unix domain sockets are not available")
+    path = socketpath(args.socket)
+    if not path:
+        parser.error("no socket given")
+    signal.signal(signal.SIGTERM, _terminate)
+    try:
+        Server(path).serve_forever()
+    except (KeyboardInterrupt, _Shutdown):
+        pass
+    except RuntimeError as exc:
+        parser.error(str(exc))
+    return 0
+
+
+# Local Variables:
+# mode: python
+# compile-command: "python ../../setup.py test"
+# time-stamp-pattern: "30/__date__ = \"%:y/%02m/%02d %02H:%02M:%02S %u\""
+# End:
@@ -0,0 +1,294 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Counters and timers for the `--stats` option.
+"""
+
+# Standard libraries.
+import collections
+import contextlib
+import functools
+import time
+
+# Local libraries.
+from .cmpline import _NUMBER, CmpLine, Comparator
+from .difflist import DiffList
+
+__date__ = "2026/10/18 15:00:00 hoel"
+__author__ = "Berthold Höllmann"
+__copyright__ = "Copyright © 2026 by DNV GL SE"
+__credits__ = ["Berthold Höllmann"]
+__maintainer__ = "Berthold Höllmann"
+__email__ = "berthold.hoellmann@dnvgl.com"
+
+
+__all__ = ["Stats", "STATS"]
+
+# Descriptions of the counters and timers, in output order.
+COUNTERS = (
+    ("eq_calls", "CmpLine.__eq__ calls"),
+    ("float_parses", "float parses"),
+    ("tolerance_checks", "tolerance checks"),
+    ("row_checks", "vectorized row checks"),
+    ("merges", "DiffList merges"),
+    ("chunks", "re-matched chunks"),
+    ("cache_hits", "cache hits"),
+)
+TIMERS = (
+    ("read", "reading"),
+    ("match", "exact line matching"),
+    ("rematch", "numerical re-matching"),
+    ("deviation", "deviation statistics"),
+)
+
+
+class Stats(object):
+    """Counters and timers collected while comparing.
+
+    Nothing is collected before `enable` is called. The counted
+    methods of `CmpLine`, `Comparator`, and `DiffList` are only wrapped
+    between `enable` and `disable`, so the comparison does not pay for
+    the counters when they are not used.
+
+    >>> stats = Stats()
+    >>> stats.count("merges")
+    >>> stats.counters["merges"]
+    0
+    >>> stats.enabled = True
+    >>> stats.count("merges", 2)
+    >>> stats.addchunks(50, 20, [('replace', 0, 20, 0, 18),
+    ...     ('replace', 20, 40, 18, 36), ('replace', 40, 50, 36, 45)])
+    >>> with stats.timer("read"):
+    ...     pass
+    >>> other = Stats()
+    >>> other.update(stats.todict(), 100, 200)
+    >>> other.counters["merges"], sorted(other.timers), dict(other.chunks)
+    (2, ['read'], {20: [1, 50]})
+    >>> other.splits
+    [[100, 150, 200, 245, [[120, 218], [140, 236]]]]"""
+
+    def __init__(self):
+        self.enabled = False
+        # Original methods replaced by the counting ones.
+        self.originals = None
+        self.clear()
+
+    def clear(self):
+        """Reset all counters and timers."""
+        self.counters = collections.Counter()
+        self.timers = collections.Counter()
+        self.files = []
+        # Number of blocks and their lines by chunk size used for
+        # re-matching.
+        self.chunks = collections.defaultdict(lambda: [0, 0])
+        # Blocks split into several chunks for re-matching in the
+        # current file pair, as line ranges and the line indices the
+        # chunks start at.
+        self.splits = []
+
+    def enable(self):
+        """Start collecting."""
+        self.enabled = True
+        if self.originals is None:
+            self.originals = _instrument(self)
+
+    def disable(self):
+        """Stop collecting, the original methods are restored."""
+        self.enabled = False
+        if self.originals is not None:
+            for cls, name, method in self.originals:
+                setattr(cls, name, method)
+            self.originals = None
+
+    def count(self, name, n=1):
+        """Increase counter `name` by `n`."""
+        if self.enabled:
+            self.counters[name] += n
+
+    def timer(self, name):
+        """Return context manager adding the time spent in the context
+        to timer `name`."""
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return self._timer(name)
+
+    @contextlib.contextmanager
+    def _timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timers[name] += time.perf_counter() - start
+
+    def addchunks(self, lines, size, chunks):
+        """Record re-matching a block of `lines` lines in the opcodes
+        `chunks` of at most `size` lines."""
+        if self.enabled:
+            self.counters["chunks"] += len(chunks)
+            entry = self.chunks[size]
+            entry[0] += 1
+            entry[1] += lines
+            if len(chunks) > 1:
+                self.splits.append(
+                    [
+                        chunks[0][1],
+                        chunks[-1][2],
+                        chunks[0][3],
+                        chunks[-1][4],
+                        [[i[1], i[3]] for i in chunks[1:]],
+                    ]
+                )
+
+    def addfile(self, file1, file2, seconds, before):
+        """Record comparing `file1` and `file2` took `seconds`, with
+        the timers at the start given by `before`."""
+        if self.enabled:
+            self.files.append(
+                dict(
+                    file1=file1,
+                    file2=file2,
+                    seconds=seconds,
+                    splits=self.splits,
+                    **{
+                        name: self.timers[name] - before.get(name, 0.0)
+                        for name, _ in TIMERS
+                    }
+                )
+            )
+            self.splits = []
+
+    def todict(self):
+        """Return the collected data, e.g. for passing it from pool
+        workers."""
+        return dict(
+            counters=dict(self.counters),
+            timers=dict(self.timers),
+            files=self.files,
+            chunks=[[size] + entry for size, entry in self.chunks.items()],
+            splits=self.splits,
+        )
+
+    def update(self, data, offset1=0, offset2=0):
+        """Add the data from `todict` of another instance, which
+        collected the split blocks of lines starting at indices
+        `offset1` and `offset2`."""
+        self.counters.update(data["counters"])
+        self.timers.update(data["timers"])
+        self.files.extend(data["files"])
+        for size, blocks, lines in data["chunks"]:
+            entry = self.chunks[size]
+            entry[0] += blocks
+            entry[1] += lines
+        for lo1, hi1, lo2, hi2, starts in data["splits"]:
+            self.splits.append(
+                [
+                    lo1 + offset1,
+                    hi1 + offset1,
+                    lo2 + offset2,
+                    hi2 + offset2,
+                    [[i + offset1, j + offset2] for i, j in starts],
+                ]
+            )
+
+    def write(self, out, identical=0, top=10):
+        """Write summary to file object `out`, listing the `top`
+        slowest comparisons with the boundaries of at most `top` chunks
+        of their `top` largest blocks split for re-matching. Line
+        numbers start at 1."""
+        out.write("numdiff statistics:\n")
+        out.write("  %-28s %12d\n" % ("files compared", len(self.files)))
+        out.write("  %-28s %12d\n" % ("identical contents", identical))
+        for name, text in TIMERS:
+            out.write("  %-28s %12.3f s\n" % ("time " + text, self.timers[name]))
+        for name, text in COUNTERS:
+            out.write("  %-28s %12d\n" % (text, self.counters[name]))
+        if self.chunks:
+            out.write("chunk sizes for re-matching:\n")
+            for size, (blocks, lines) in sorted(self.chunks.items()):
+                out.write(
+                    "  %8d lines  %8d blocks  %10d lines matched\n"
+                    % (size, blocks, lines)
+                )
+        if self.files:
+            out.write("slowest comparisons:\n")
+            for entry in sorted(self.files, key=lambda x: -x["seconds"])[:top]:
+                out.write(
+                    "  %9.3f s  %s %s (%s)\n"
+                    % (
+                        entry["seconds"],
+                        entry["file1"],
+                        entry["file2"],
+                        ", ".join(
+                            "%s %.3f s" % (name, entry[name]) for name, _ in TIMERS
+                        ),
+                    )
+                )
+                splits = sorted(entry.get("splits", ()), key=lambda x: x[0] - x[1])
+                for lo1, hi1, lo2, hi2, starts in splits[:top]:
+                    out.write(
+                        "    lines %d-%d/%d-%d re-matched in %d chunks, "
+                        "split before lines %s%s\n"
+                        % (
+                            lo1 + 1,
+                            hi1,
+                            lo2 + 1,
+                            hi2,
+                            len(starts) + 1,
+                            ", ".join(
+                                "%d/%d" % (i + 1, j + 1) for i, j in starts[:top]
+                            ),
+                            ", ..." if len(starts) > top else "",
+                        )
+                    )
+
+
+def _instrument(stats):
+    """Wrap the counted methods to count into `stats`, return a list
+    of the classes, method names, and original methods."""
+    eq, parse, fequals = CmpLine.__eq__, CmpLine._parse, Comparator.fequals
+    append = DiffList.append
+
+    @functools.wraps(eq)
+    def counted_eq(self, other):
+        stats.counters["eq_calls"] += 1
+        return eq(self, other)
+
+    @functools.wraps(parse)
+    def counted_parse(self):
+        parse(self)
+        stats.counters["float_parses"] += sum(
+            1 for kind in self._kinds if kind & _NUMBER
+        )
+
+    @functools.wraps(fequals)
+    def counted_fequals(self, float1, float2):
+        stats.counters["tolerance_checks"] += 1
+        return fequals(self, float1, float2)
+
+    @functools.wraps(append)
+    def counted_append(self, val):
+        if len(self) and self[-1][0] == val[0]:
+            stats.counters["merges"] += 1
+        return append(self, val)
+
+    CmpLine.__eq__ = counted_eq
+    CmpLine._parse = counted_parse
+    Comparator.fequals = counted_fequals
+    DiffList.append = counted_append
+    return [
+        (CmpLine, "__eq__", eq),
+        (CmpLine, "_parse", parse),
+        (Comparator, "fequals", fequals),
+        (DiffList, "append", append),
+    ]
+
+
+# Statistics of this process.
+STATS = Stats()
+
+
+# Local Variables:
+# mode: python
+# compile-command: "python ../../setup.py test"
+# time-stamp-pattern: "30/__date__ = \"%:y/%02m/%02d %02H:%02M:%02S %u\""
+# End:
@@ -0,0 +1,178 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Comparing files in a sliding window of lines with bounded memory.
+"""
+
+# Standard libraries.
+import itertools
+
+__date__ = "2026/10/18 09:00:00 hoel"
+__author__ = "Berthold Höllmann"
+__copyright__ = "Copyright © 2026 by DNV GL SE"
+__credits__ = ["Berthold Höllmann"]
+__maintainer__ = "Berthold Höllmann"
+__email__ = "berthold.hoellmann@dnvgl.com"
+
+
+__all__ = ["LineBuffer", "StreamDiff"]
+
+
+class LineBuffer(object):
+    """Lines of one input, kept from line index `start` on.
+
+    Slicing uses the line indices of the complete input.
+
+    >>> a = LineBuffer(str(i) for i in range(10))
+    >>> a.fill(5)
+    >>> a[2:4]
+    ['2', '3']
+    >>> a.discard(3)
+    >>> a.start, a.end, a[3:5]
+    (3, 5, ['3', '4'])"""
+
+    def __init__(self, lines):
+        self.lines = iter(lines)
+        self.buf = []
+        self.start = 0
+        self.eof = False
+
+    @property
+    def end(self):
+        """Index after the last line read (property)"""
+        return self.start + len(self.buf)
+
+    def fill(self, stop):
+        """Read lines until index `stop` is reached or the input is
+        exhausted."""
+        if self.eof or stop <= self.end:
+            return
+        size = stop - self.end
+        self.buf.extend(itertools.islice(self.lines, size))
+        if self.end < stop:
+            self.eof = True
+
+    def discard(self, stop):
+        """Forget all lines before index `stop`."""
+        if stop > self.start:
+            del self.buf[: stop - self.start]
+            self.start = stop
+
+    def __getitem__(self, item):
+        if item.start < self.start:
+            raise IndexError("line %d already discarded" % item.start)
+        return self.buf[item.start - self.start : item.stop - self.start]
+
+
+class StreamDiff(object):
+    """Align two line sequences window by window.
+
+    Each window of `window` lines from both inputs is handed to
+    `align`. The opcodes up to the last `equal` run are final, the rest
+    is aligned again together with the next window. Only lines still
+    needed for the pending context diff hunk are kept.
+
+    >>> import difflib
+    >>> align = lambda a, b: difflib.SequenceMatcher(None, a, b).get_opcodes()
+    >>> diff = StreamDiff("abcdefghijkl", "abcXefghijkY", align, n=1, window=4)
+    >>> for group in diff.groups():
+    ...     print(group)
+    [('equal', 2, 3, 2, 3), ('replace', 3, 4, 3, 4), ('equal', 4, 5, 4, 5)]
+    [('equal', 10, 11, 10, 11), ('replace', 11, 12, 11, 12)]"""
+
+    def __init__(self, lines1, lines2, align, n=3, window=10000):
+        self.lines1 = LineBuffer(lines1)
+        self.lines2 = LineBuffer(lines2)
+        self.align = align
+        self.n = n
+        self.window = max(window, 1)
+        self._group = []
+        self._equal = None
+        self._first = True
+
+    def groups(self):
+        """Generate the groups of opcodes for the context diff hunks,
+        like `difflib.SequenceMatcher.get_grouped_opcodes`."""
+        pos1 = pos2 = 0
+        while True:
+            self.lines1.fill(pos1 + self.window)
+            self.lines2.fill(pos2 + self.window)
+            final = self.lines1.eof and self.lines2.eof
+            opcodes = list(
+                self.align(
+                    self.lines1[pos1 : self.lines1.end],
+                    self.lines2[pos2 : self.lines2.end],
+                )
+            )
+            if not opcodes:
+                break
+            if not final:
+                # Everything up to the last run of equal lines is final.
+                last = [i for i, op in enumerate(opcodes) if op[0] == "equal"]
+                if last:
+                    opcodes = opcodes[: last[-1] + 1]
+            for tag, i1, i2, j1, j2 in opcodes:
+                op = (tag, i1 + pos1, i2 + pos1, j1 + pos2, j2 + pos2)
+                for group in self._push(op):
+                    yield group
+            pos1 += opcodes[-1][2]
+            pos2 += opcodes[-1][4]
+            if final:
+                break
+            if self._group:
+                keep1, keep2 = self._group[0][1], self._group[0][3]
+            elif self._equal is not None:
+                _, i1, i2, j1, j2 = self._equal
+                keep1, keep2 = max(i1, i2 - self.n), max(j1, j2 - self.n)
+            else:
+                keep1, keep2 = pos1, pos2
+            self.lines1.discard(keep1)
+            self.lines2.discard(keep2)
+        if self._equal is not None:
+            for group in self._add(self._equal, True):
+                yield group
+        if self._group and not (
+            len(self._group) == 1 and self._group[0][0] == "equal"
+        ):
+            yield self._group
+
+    def _push(self, op):
+        """Take the next opcode. Runs of equal lines are collected until
+        the next change shows up."""
+        if op[0] == "equal":
+            if self._equal is None:
+                self._equal = op
+            else:
+                self._equal = ("equal", self._equal[1], op[2], self._equal[3], op[4])
+            return
+        if self._equal is not None:
+            for group in self._add(self._equal, False):
+                yield group
+            self._equal = None
+        for group in self._add(op, False):
+            yield group
+
+    def _add(self, op, last):
+        """Add opcode to the current group, yield the group when it is
+        complete."""
+        tag, i1, i2, j1, j2 = op
+        n = self.n
+        if tag == "equal":
+            if self._first:
+                i1, j1 = max(i1, i2 - n), max(j1, j2 - n)
+            if last:
+                i2, j2 = min(i2, i1 + n), min(j2, j1 + n)
+            if i2 - i1 > n + n:
+                self._group.append((tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)))
+                yield self._group
+                self._group = []
+                i1, j1 = max(i1, i2 - n), max(j1, j2 - n)
+        self._first = False
+        self._group.append((tag, i1, i2, j1, j2))
+
+
+# Local Variables:
+# mode: python
+# compile-command: "python ../../setup.py test"
+# time-stamp-pattern: "30/__date__ = \"%:y/%02m/%02d %02H:%02M:%02S %u\""
+# End:
@@ -0,0 +1,142 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Testing the numdiff.align module.
+"""
+
+# Standard libraries.
+import glob
+import os.path
+import random
+
+# Third party libraries.
+import pytest
+# DNV GL libraries.
+from numdiff import compare_files
+from numdiff.align import ALGORITHMS, anchors, getopcodes
+
+__date__ = "2026/10/18 17:00:00 hoel"
+__author__ = "Berthold Höllmann"
+__copyright__ = "Copyright © 2026 by DNV GL SE"
+__credits__ = ["Berthold Höllmann"]
+__maintainer__ = "Berthold Höllmann"
+__email__ = "berthold.hoellmann@dnvgl.com"
+
+
+REF = os.path.join(os.path.dirname(__file__), "..", "..", "..", "test", "ref")
+
+
+def lcs(a, b):
+    """Length of the longest common subsequence of `a` and `b`."""
+    prev = [0] * (len(b) + 1)
+    for x in a:
+        cur = [0]
+        for j, y in enumerate(b):
+            cur.append(prev[j] + 1 if x == y else max(prev[j + 1], cur[j]))
+        prev = cur
+    return prev[-1]
+
+
+def equal_lines(a, b, opcodes):
+    """Check `opcodes` cover `a` and `b` and return the number of lines
+    in "equal" blocks."""
+    i = j = result = 0
+    for tag, i1, i2, j1, j2 in opcodes:
+        assert (i1, j1) == (i, j)
+        if tag == "equal":
+            assert a[i1:i2] == b[j1:j2]
+            result += i2 - i1
+        i, j = i2, j2
+    assert (i, j) == (len(a), len(b))
+    return result
+
+
+def refpairs():
+    names = sorted(glob.glob(os.path.join(REF, "*1.txt")))
+    return [
+        (i, i[:-5] + "2.txt") for i in names if os.path.exists(i[:-5] + "2.txt")
+    ] + [(os.path.join(REF, "utf-8.1.txt"), os.path.join(REF, "utf-8.2.txt"))]
+
+
+class TestGetopcodes(object):
+    @pytest.mark.parametrize("algorithm", ALGORITHMS)
+    def test_random_001(self, algorithm):
+        rand = random.Random(1)
+        for _ in range(300):
+            a = [rand.choice("abc") for _ in range(rand.randint(0, 30))]
+            b = [rand.choice("abcd") for _ in range(rand.randint(0, 30))]
+            found = equal_lines(a, b, getopcodes(a, b, algorithm))
+            if algorithm == "myers":
+                # Myers' algorithm finds a minimal edit script.
+                assert found == lcs(a, b)
+
+    @pytest.mark.parametrize("algorithm", ALGORITHMS)
+    def test_empty_001(self, algorithm):
+        assert getopcodes([], [], algorithm) == []
+        assert getopcodes(["a"], [], algorithm) == [("delete", 0, 1, 0, 0)]
+        assert getopcodes([], ["a"], algorithm) == [("insert", 0, 0, 0, 1)]
+
+    @pytest.mark.parametrize("algorithm", ALGORITHMS)
+    def test_same_001(self, algorithm):
+        assert getopcodes(list("abc"), list("abc"), algorithm) == [
+            ("equal", 0, 3, 0, 3)
+        ]
+
+    @pytest.mark.parametrize("algorithm", ["patience", "histogram"])
+    def test_anchor_001(self, algorithm):
+        # The unique "f" line is matched, with the braces following it.
+        a = ["{", "}", "f", "{", "}", "{", "}"]
+        b = ["f", "{", "}", "g"]
+        assert getopcodes(a, b, algorithm) == [
+            ("delete", 0, 2, 0, 0),
+            ("equal", 2, 5, 0, 3),
+            ("replace", 5, 7, 3, 4),
+        ]
+
+    def test_anchors_001(self):
+        a = ["x", "a", "b", "c", "a", "d", "e", "f", "g"]
+        b = ["a", "b", "c", "d", "e", "y", "g", "f", "h"]
+        # "a" is not unique, "f" and "g" swapped, only "b" lies between
+        # equal lines in both.
+        assert anchors(a, b) == [(2, 1)]
+
+
+class TestAlgorithm(object):
+    @pytest.mark.parametrize("algorithm", ALGORITHMS[1:])
+    @pytest.mark.parametrize(
+        "files", refpairs(), ids=[os.path.basename(i) for i, _ in refpairs()]
+    )
+    def test_ref_001(self, files, algorithm):
+        # The reference files align the same with all algorithms.
+        assert compare_files(*files, algorithm=algorithm).diff == (
+            compare_files(*files).diff
+        )
+
+    @pytest.mark.parametrize("algorithm", ALGORITHMS[1:])
+    def test_ref_002(self, algorithm):
+        files = [os.path.join(REF, i) for i in ("mlab_R2007b", "mlab_R2012a")]
+        for matlab in (False, True):
+            assert compare_files(*files, algorithm=algorithm, matlab=matlab).diff == (
+                compare_files(*files, matlab=matlab).diff
+            )
+
+    @pytest.mark.parametrize("algorithm", ALGORITHMS)
+    def test_insert_001(self, tmp_path, algorithm):
+        # No exactly equal lines, so the numerical comparison aligns
+        # all of them, finding the single inserted line only.
+        lines1 = ["%d %.10f" % (i, i * 0.37) for i in range(60)]
+        lines2 = ["%d %.10f" % (i, i * 0.37 * (1 + 1e-9) + 1e-12) for i in range(60)]
+        lines2.insert(5, "inserted 1.0")
+        (tmp_path / "a.txt").write_text("\n".join(lines1) + "\n")
+        (tmp_path / "b.txt").write_text("\n".join(lines2) + "\n")
+        files = str(tmp_path / "a.txt"), str(tmp_path / "b.txt")
+        assert compare_files(*files, algorithm=algorithm).hunks == [
+            ("insert", 5, 5, 5, 6)
+        ]
+
+
+# Local Variables:
+# mode: python
+# compile-command: "python ../../../setup.py test"
+# time-stamp-pattern: "30/__date__ = \"%:y/%02m/%02d %02H:%02M:%02S %u\""
+# End:
@@ -4,8 +4,10 @@
 Testing the numdiff.cmpline module.
 """
 
+# Third party libraries.
+import pytest
 # DNV GL libraries.
-from numdiff.cmpline import CmpLine
+from numdiff.cmpline import CmpLine, Comparator, rows_equal
 
 __date__ = "2022/04/30 19:10:43 hoel"
 __author__ = "Berthold Höllmann"
@@ -23,6 +25,104 @@ class TestCmpLine(object):
         assert a != c
         assert a == b
 
+    def test_compare_002(self):
+        a = CmpLine("1.5abc 2")
+        assert a != CmpLine("1.5 2")
+        assert a == CmpLine("1.5abc 2.0000000001")
+
+    def test_compare_003(self):
+        a = CmpLine("x nan")
+        assert a == CmpLine("x nan")
+        assert a != CmpLine("x 1")
+
+    def test_parse_001(self):
+        a = CmpLine("AA 1.5 BB -2e3")
+        assert a == CmpLine("AA 1.5000000001 BB -2000")
+        assert a._tokens == ("AA", "1.5", "BB", "-2e3")
+        assert a._kinds == bytes((0, 3, 0, 3))
+        assert list(a._numbers) == [0.0, 1.5, 0.0, -2000.0]
+
+    def test_hash_001(self):
+        a = CmpLine("AA 1.00000000001  2")
+        b = CmpLine("AA 1  2.0")
+        assert a == b
+        assert hash(a) == hash(b)
+
+    def test_hash_002(self):
+        opts = {"fixcols": None, "ignore_space": True, "splitre": r"\|"}
+        a = CmpLine("x | 1.0 | -2e-3", opts)
+        b = CmpLine("x|1|-0.002", opts)
+        assert a == b
+        assert hash(a) == hash(b)
+
+    def test_hash_003(self):
+        assert hash(CmpLine("AA 1")) != hash(CmpLine("AA 1 2"))
+        assert hash(CmpLine("AA 1")) != hash(CmpLine("BB 1"))
+
+    def test_hash_004(self):
+        opts = {"fixcols": None, "ignore": "REV"}
+        assert hash(CmpLine("REV 1", opts)) == hash(CmpLine("other", opts))
+
+
+class TestComparator(object):
+    def test_comparator_001(self):
+        comp = Comparator({"fixcols": None, "splitre": r"\|", "aeps": 0.5})
+        a, b = comp.line("x|1"), comp.line("x|1.4")
+        assert a.comparator is b.comparator is comp
+        assert a == b
+        assert a != comp.line("x|1.6")
+        assert CmpLine("x|1", comp) == b
+
+    def test_comparator_002(self):
+        opts = {"fixcols": [2, 4], "ignore": "^#"}
+        comp = Comparator(opts)
+        assert Comparator.get(comp) is comp
+        assert Comparator.get(opts).options is opts
+        assert comp.line("ab12") == comp.line("ab12.000000001")
+        assert comp.line("# 1") == comp.line("# 2")
+        assert Comparator({"fixcols": [2, 4]}).line("ab12").skeleton() == ("ab", None)
+
+    def test_comparator_003(self, capsys):
+        comp = Comparator({"fixcols": None, "verbose": True})
+        assert comp.line("a 1") == comp.line("a 1.0000000001")
+        out = capsys.readouterr().out
+        assert "FLOAT !a 1! !a 1.0000000001!" in out
+        assert "SAME" in out
+
+
+class TestFixcols(object):
+    def test_fixcols_001(self):
+        comp = Comparator({"fixcols": [8, 24, 40]})
+        a = comp.line("GRID*   %16s%16s" % ("1.25-3", "-.5D+2"))
+        b = comp.line("GRID*   %16s%16s" % ("0.00125", "-50.000001"))
+        assert a == b
+        assert hash(a) == hash(b)
+        assert list(a._numbers) == [0.0, 0.00125, -50.0]
+        assert a != comp.line("GRID*   %16s%16s" % ("1.25-2", "-50"))
+
+    def test_fixcols_002(self):
+        comp = Comparator({"fixcols": [4, 8]})
+        assert comp.parse("ab  1-3 ")[1] == bytes((0, 0))
+        # Without fixed columns "1.5-3" is no Fortran style number.
+        tokens, kinds, _ = Comparator({"fixcols": None}).parse("x 1.5-3")
+        assert (tokens, kinds) == (("x", "1.5-3"), bytes((0, 0)))
+        assert CmpLine("x 1.5-3") != CmpLine("x 0.0015")
+
+    def test_fixcols_003(self):
+        comp = Comparator({"fixcols": [3]})
+        assert comp.split("1.5-3") == ("1.5",)
+
+
+class TestRowsEqual(object):
+    def test_rows_equal_001(self):
+        pytest.importorskip("numpy")
+        a = [CmpLine(i) for i in ("a 1", "b 2", "c", "d 1 2", "e inf", "f 1")]
+        b = [CmpLine(i) for i in ("a 1.000000001", "b 3", "c", "d 1", "e inf", "g 1")]
+        assert rows_equal(a, b) == [True, False, True, False, False, False]
+
+    def test_rows_equal_002(self):
+        assert rows_equal([CmpLine("a")], []) is None
+
 
 # Local Variables:
 # mode: python
@@ -0,0 +1,114 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Testing the numdiff.deviation module.
+"""
+
+# Standard libraries.
+import random
+
+# Third party libraries.
+import pytest
+# DNV GL libraries.
+from numdiff import deviation
+from numdiff.cmpline import Comparator
+from numdiff.deviation import Deviation
+
+__date__ = "2026/10/18 20:00:00 hoel"
+__author__ = "Berthold Höllmann"
+__copyright__ = "Copyright © 2026 by DNV GL SE"
+__credits__ = ["Berthold Höllmann"]
+__maintainer__ = "Berthold Höllmann"
+__email__ = "berthold.hoellmann@dnvgl.com"
+
+
+def tables(seed, count=300):
+    """Two lists of lines with numbers differing by all orders of
+    magnitude, zeros, and rows of different lengths."""
+    rand = random.Random(seed)
+    lines1, lines2 = [], []
+    for i in range(count):
+        row1 = ["x%d" % i]
+        row2 = list(row1)
+        for _ in range(rand.randint(0, 5)):
+            value = rand.choice([0.0, 1.0, rand.uniform(-1e3, 1e3)])
+            factor = 1 + rand.choice([0, 0, 1e-14, 1e-10, 1e-7, 1e-4, 0.5, 3])
+            row1.append(repr(value))
+            row2.append(repr(value * factor + rand.choice([0, 0, 1e-8])))
+        if rand.random() < 0.05:
+            row2.append("1.0")
+        if rand.random() < 0.05:
+            row2[-1] = row2[-1].replace(".0", "")
+        lines1.append(" ".join(row1))
+        lines2.append(" ".join(row2))
+    return lines1, lines2
+
+
+class TestDeviation(object):
+    @pytest.mark.parametrize("seed", range(5))
+    def test_numpy_001(self, seed, monkeypatch):
+        # The vectorized pass gives the same result as the loop.
+        pytest.importorskip("numpy")
+        lines1, lines2 = tables(seed)
+        opcodes = [("replace", 0, len(lines1), 0, len(lines2))]
+        options = Comparator({"fixcols": None})
+        found = Deviation.fromlines(opcodes, lines1, lines2, options)
+        monkeypatch.setattr(deviation, "_numpy", lambda: None)
+        expected = Deviation.fromlines(opcodes, lines1, lines2, options)
+        assert found.count == expected.count > 0
+        assert found.todict() == expected.todict()
+
+    def test_zero_001(self):
+        dev = Deviation.fromlines(
+            [("replace", 0, 2, 0, 2)],
+            ["a 1e-9 1.0", "b 2"],
+            ["a 0 1", "b 2.5"],
+            {"fixcols": None, "aeps": 0},
+        )
+        # Equal numbers written differently do not count, deviations
+        # from 0 count for the absolute deviation and as relative
+        # deviations of 1 or more.
+        assert dev.count == 2
+        assert dev.abs == (0.5, 1, 1, 1)
+        assert dev.rel == (0.2, 1, 1, 1)
+        assert dev.columns == {1: [0, 0, 0, 0, 1, 1]}
+
+    def test_equal_001(self):
+        # Lines equal within the tolerances, or aligned as equal, do
+        # not count.
+        lines1 = ["a %d 1.0" % i for i in range(40)]
+        lines2 = ["a %d 1.000001" % i for i in range(40)]
+        lines2[7] = "a 7 1.5"
+        opcodes = [("replace", 0, 40, 0, 40)]
+        dev = Deviation.fromlines(opcodes, lines1, lines2, {"fixcols": None})
+        assert (dev.count, dev.abs[1:]) == (1, (7, 7, 2))
+        dev = Deviation.fromlines(
+            opcodes, lines1, lines2, {"fixcols": None, "aeps": 1.0}
+        )
+        assert dev.summary() == "numerical deviations: none"
+        dev = Deviation.fromlines(
+            [("equal", 0, 40, 0, 40)], lines1, lines2, {"fixcols": None}
+        )
+        assert dev.count == 0
+
+    def test_todict_001(self):
+        lines1, lines2 = tables(1, 50)
+        dev = Deviation.fromlines(
+            [("replace", 0, 50, 0, 50)], lines1, lines2, {"fixcols": None}
+        )
+        copy = Deviation.fromdict(dev.todict())
+        assert (copy.abs, copy.rel, copy.count, copy.columns) == (
+            dev.abs,
+            dev.rel,
+            dev.count,
+            dev.columns,
+        )
+        assert copy.summary() == dev.summary()
+        assert Deviation().summary() == "numerical deviations: none"
+
+
+# Local Variables:
+# mode: python
+# compile-command: "python ../../../setup.py test"
+# time-stamp-pattern: "30/__date__ = \"%:y/%02m/%02d %02H:%02M:%02S %u\""
+# End:
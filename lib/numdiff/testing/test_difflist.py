@@ -0,0 +1,106 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Testing the numdiff.difflist module.
+"""
+
+# Standard libraries.
+import difflib
+import random
+
+# Third party libraries.
+import pytest
+# DNV GL libraries.
+from numdiff.difflist import DiffList
+
+__date__ = "2026/10/18 18:00:00 hoel"
+__author__ = "Berthold Höllmann"
+__copyright__ = "Copyright © 2026 by DNV GL SE"
+__credits__ = ["Berthold Höllmann"]
+__maintainer__ = "Berthold Höllmann"
+__email__ = "berthold.hoellmann@dnvgl.com"
+
+
+def opcodes(rand, count):
+    """Random sequence of `count` opcodes."""
+    i = j = 0
+    result = []
+    for _ in range(count):
+        tag = rand.choice(["equal", "replace", "delete", "insert"])
+        di = 0 if tag == "insert" else rand.randint(1, 10)
+        dj = di if tag == "equal" else 0 if tag == "delete" else rand.randint(1, 10)
+        result.append((tag, i, i + di, j, j + dj))
+        i, j = i + di, j + dj
+    return result
+
+
+class TestDiffList(object):
+    @pytest.mark.parametrize("seed", range(20))
+    def test_grouped_001(self, seed):
+        rand = random.Random(seed)
+        diff = DiffList(maxchunk=10)
+        diff.extend(opcodes(rand, rand.randint(0, 30)))
+        vals = diff.vals
+        seq = difflib.SequenceMatcher(None, [], [])
+        for n in (0, 1, 3):
+            # `get_grouped_opcodes` changes the opcodes it gets.
+            seq.opcodes = list(vals)
+            assert list(diff.grouped(n)) == list(seq.get_grouped_opcodes(n))
+        assert diff.vals == vals
+
+    def test_append_001(self):
+        diff = DiffList(maxchunk=3)
+        diff.extend([("replace", 0, 2, 0, 1), ("replace", 2, 7, 1, 3)])
+        assert diff.vals == [
+            ("replace", 0, 3, 0, 1),
+            ("replace", 3, 6, 1, 2),
+            ("replace", 6, 7, 2, 3),
+        ]
+        diff.append(("equal", 7, 9, 3, 5))
+        diff.append(("equal", 9, 10, 5, 6))
+        assert diff[-1] == ("equal", 7, 10, 3, 6)
+        assert diff[1:3] == [("replace", 3, 6, 1, 2), ("replace", 6, 7, 2, 3)]
+        assert len(diff) == 4
+
+    def test_append_002(self):
+        diff = DiffList()
+        diff.append(("equal", 0, 2, 0, 2))
+        with pytest.raises(ValueError):
+            diff.append(("equal", 3, 4, 3, 4))
+
+    @pytest.mark.parametrize("seed", range(20))
+    def test_prepres_001(self, seed):
+        # Chunks cover the block, only those with lines on both sides
+        # are replacements.
+        rand = random.Random(seed)
+        ai, bi = rand.randint(0, 5), rand.randint(0, 5)
+        aj, bj = ai + rand.randint(1, 40), bi + rand.randint(0, 40)
+        chunks = DiffList.prepres("replace", ai, aj, bi, bj, rand.randint(1, 8))
+        assert (chunks[0][1], chunks[0][3]) == (ai, bi)
+        assert (chunks[-1][2], chunks[-1][4]) == (aj, bj)
+        for (_, _, i2, _, j2), (_, i1, _, j1, _) in zip(chunks, chunks[1:]):
+            assert (i2, j2) == (i1, j1)
+        for tag, i1, i2, j1, j2 in chunks:
+            assert tag == {
+                (True, True): "replace",
+                (True, False): "delete",
+                (False, True): "insert",
+            }[(i2 > i1, j2 > j1)]
+        diff = DiffList(maxchunk=3)
+        diff.append(("replace", ai, aj, bi, bj))
+        assert all(i[2] > i[1] and i[4] > i[3] for i in diff if i[0] == "replace")
+
+    def test_append_003(self):
+        # Merging takes constant time, many alternating hunks are fine.
+        diff = DiffList(maxchunk=10)
+        for i in range(0, 200000, 2):
+            diff.append(("equal", i, i + 1, i, i + 1))
+            diff.append(("replace", i + 1, i + 2, i + 1, i + 2))
+        assert len(diff) == 200000
+
+
+# Local Variables:
+# mode: python
+# compile-command: "python ../../../setup.py test"
+# time-stamp-pattern: "30/__date__ = \"%:y/%02m/%02d %02H:%02M:%02S %u\""
+# End:
@@ -4,14 +4,23 @@
 Testing routines in the numdiff module.
 """
 
+import argparse
+import gzip
+import json
 import os.path
+import random
 # Standard libraries.
 import re
+import sys
+import threading
+from xml.etree import ElementTree
 
 # Third party libraries.
 import pytest
 # DNV GL libraries.
-from numdiff import Main
+import numdiff
+from numdiff import Main, compare_files, compare_trees
+from numdiff.cmpline import CmpLine
 
 __date__ = "2022/04/30 19:10:30 hoel"
 __author__ = "Berthold Höllmann"
@@ -124,74 +133,463 @@ class TestMain(object):
     def test_lstcomp_011(self):
         assert Main.lstcomp([], [1, 2, 3]) == [(None, 1), (None, 2), (None, 3)]
 
-    @pytest.fixture(scope="class")
-    def main_1(self):
-        return Main()
-
-    def test_shorttree_1_001(self, main_1):
-        assert main_1.shorttree(
-            iDir="ref/1", *("ref/1", ["1", ".svn"], ["2", "3", "4"])
-        ) == ["1", ".svn", "2", "3", "4"]
-
-    def test_shorttree_1_002(self, main_1):
-        assert [
-            "/".join(os.path.split(i))
-            for i in main_1.shorttree(iDir="ref/1", *("ref/1/1", [".svn"], []))
-        ] == ["1/.svn"]
-
-    def test_shorttree_1_003(self, main_1):
-        assert list(
-            [
-                "/".join(os.path.split(i))
-                for i in main_1.shorttree(
-                    iDir="ref/1",
-                    *(
-                        "ref/1/1/.svn",
-                        ["text-base", "prop-base", "props", "tmp"],
-                        ["entries", "all-wcprops"],
-                    )
-                )
-            ]
-        ) == [
-            "1/.svn/text-base",
-            "1/.svn/prop-base",
-            "1/.svn/props",
-            "1/.svn/tmp",
-            "1/.svn/entries",
-            "1/.svn/all-wcprops",
-        ]
-
-    def test_shorttree_1_004(self, main_1):
-        assert main_1.shorttree(iDir="esrD", *("esrD", [], ["data.txt"])) == [
-            "data.txt"
-        ]
-
-    @pytest.fixture(scope="class")
-    def main_2(self):
-        res = Main()
-        res.exclude = re.compile(r"\.svn").match
-        return res
-
-    def test_shorttree_2_001(self, main_2):
-        assert main_2.shorttree(
-            iDir="ref/1", *("ref/1", ["1", ".svn"], ["2", "3", "4"])
-        ) == ["1", "2", "3", "4"]
-
-    def test_shorttree_2_002(self, main_2):
-        assert main_2.shorttree(iDir="ref/1", *("ref/1/1", [".svn"], [])) == []
-
-    def test_shorttree_2_003(self, main_2):
-        assert (
-            main_2.shorttree(
-                iDir="ref/1",
-                *(
-                    "ref/1/1/.svn",
-                    ["text-base", "prop-base", "props", "tmp"],
-                    ["entries", "all-wcprops"],
-                )
-            )
-            == []
+    def test_cmpblock_001(self):
+        main = Main()
+        main.optdict = {"fixcols": None}
+        lines1 = ["x"] + ["a %d" % i for i in range(20)] + ["b 1", "c 1"]
+        lines2 = ["y"] + ["a %d.0000000001" % i for i in range(20)] + ["b 2", "c 1"]
+        assert main.cmpblock(lines1, lines2, 1, 23, 1, 23) == [
+            ("equal", 1, 21, 1, 21),
+            ("replace", 21, 22, 21, 22),
+            ("equal", 22, 23, 22, 23),
+        ]
+
+    def test_cmpblock_002(self):
+        main = Main()
+        main.optdict = {"fixcols": None}
+        assert main.cmpblock(["a 1", "b 2"], ["b 2.0"], 0, 2, 0, 1) == [
+            ("delete", 0, 1, 0, 0),
+            ("equal", 1, 2, 0, 1),
+        ]
+
+    def test_chunksize_001(self):
+        # Many numbers per line, all sharing the skeleton: small chunks.
+        main = Main()
+        a = [CmpLine(" ".join(["1.5"] * 60)) for _ in range(100)]
+        assert main.chunksize(a, a) == main.MINCHUNK
+
+    def test_chunksize_002(self):
+        # Table rows sharing the skeleton with few numbers.
+        main = Main()
+        a = [CmpLine("%d %d %d" % (i, i, i)) for i in range(200)]
+        assert main.chunksize(a, a[:150]) == 40
+
+    def test_chunksize_003(self):
+        # Half the line pairs share the skeleton.
+        main = Main()
+        a = [CmpLine("%s %d" % ("ab"[i % 2], i)) for i in range(400)]
+        assert main.chunksize(a, a) == 120
+
+    def test_align_001(self):
+        main = Main()
+        main.args = argparse.Namespace(verbose=False)
+        main.optdict = {"fixcols": None}
+        lines1 = ["a", "b", "x 1", "y", "c", "d"]
+        lines2 = ["a", "b", "x 1.0", "z", "c", "d"]
+        assert main.align(lines1, lines2).vals == [
+            ("equal", 0, 3, 0, 3),
+            ("replace", 3, 4, 3, 4),
+            ("equal", 4, 6, 4, 6),
+        ]
+
+
+class TestDeepcheck(object):
+    @pytest.fixture
+    def trees(self, tmp_path):
+        for name, data in (
+            ("a/x.txt", "1 2.0\n3 4\n"),
+            ("b/x.txt", "1 2.000000000001\n3 5\n"),
+            ("a/sub/y.txt", "a\n" * 50),
+            ("b/sub/y.txt", "a\n" * 50 + "b\n"),
+            ("a/sub/z.txt", "z\n"),
+            ("b/w.txt", "w\n"),
+            ("a/same.txt", "1 2 3\n" * 100),
+            ("b/same.txt", "1 2 3\n" * 100),
+        ):
+            path = tmp_path / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(data)
+        return str(tmp_path / "a"), str(tmp_path / "b")
+
+    def run(self, monkeypatch, capsys, *argv):
+        monkeypatch.setattr(sys, "argv", ["numdiff"] + list(argv))
+        result = Main()()
+        return result, capsys.readouterr().out
+
+    def test_treepairs_001(self, trees):
+        main = Main()
+        pairs = [
+            (i, j, obj1.__class__.__name__ if obj1 else None)
+            for i, j, obj1, obj2 in main.treepairs(*trees)
+        ]
+        sub = os.path.join("sub", "")
+        assert pairs == [
+            ("same.txt", "same.txt", "RegularFile"),
+            ("sub", "sub", "Directory"),
+            (sub + "y.txt", sub + "y.txt", "RegularFile"),
+            (sub + "z.txt", None, "RegularFile"),
+            (None, "w.txt", None),
+            ("x.txt", "x.txt", "RegularFile"),
+        ]
+
+    def test_treepairs_002(self, trees):
+        main = Main()
+        main.exclude = re.compile("sub").match
+        assert main.dirtreecomp(*trees) == [
+            ("same.txt", "same.txt"),
+            (None, "w.txt"),
+            ("x.txt", "x.txt"),
+        ]
+
+    def test_jobs_001(self, trees, monkeypatch, capsys):
+        serial = self.run(monkeypatch, capsys, "-r", *trees)
+        parallel = self.run(monkeypatch, capsys, "-r", "-j", "3", *trees)
+        assert serial[0] == 1
+        assert "Only in" in serial[1]
+        assert "! 3 5" in serial[1]
+        assert parallel == serial
+
+    def test_cache_001(self, trees, tmp_path, monkeypatch, capsys):
+        cache = str(tmp_path / "cache.db")
+        first = self.run(monkeypatch, capsys, "-r", "--cache", cache, *trees)
+        second = self.run(monkeypatch, capsys, "-r", "--cache", cache, *trees)
+        assert first == second == self.run(monkeypatch, capsys, "-r", *trees)
+        brief = self.run(monkeypatch, capsys, "-rq", "--cache", cache, *trees)
+        assert "differ" in brief[1]
+        assert "! 3 5" not in brief[1]
+        other = self.run(monkeypatch, capsys, "-r", "-a", "2", "--cache", cache, *trees)
+        assert "! 3 5" not in other[1]
+
+    def test_identical_001(self, trees, monkeypatch, capsys):
+        result, out = self.run(monkeypatch, capsys, "-r", "--verbose", *trees)
+        assert "1 file pairs with identical contents" in out
+        result, out = self.run(monkeypatch, capsys, "-r", "-j2", "--verbose", *trees)
+        assert "1 file pairs with identical contents" in out
+
+    def test_format_001(self, trees, tmp_path, monkeypatch, capsys):
+        result, out = self.run(monkeypatch, capsys, "-r", "--format", "jsonl", *trees)
+        assert result == 1
+        records = {
+            os.path.basename(i["file1"]): i for i in map(json.loads, out.splitlines())
+        }
+        assert records["x.txt"]["verdict"] == "differ"
+        assert records["x.txt"]["hunks"] == [["replace", 1, 2, 1, 2]]
+        assert records["x.txt"]["deviation"]["abs"] == {
+            "value": 1.0,
+            "i": 1,
+            "j": 1,
+            "token_index": 1,
+        }
+        assert records["same.txt"]["verdict"] == "equal"
+        assert records["z.txt"]["verdict"] == "only"
+        cache = str(tmp_path / "cache.db")
+        argv = ("-r", "--format", "jsonl", "--cache", cache) + trees
+        self.run(monkeypatch, capsys, "-r", "--cache", cache, *trees)
+        for _ in range(2):
+            out = self.run(monkeypatch, capsys, *argv)[1]
+            cached = {
+                os.path.basename(i["file1"]): i for i in map(json.loads, out.splitlines())
+            }
+            for record in list(records.values()) + list(cached.values()):
+                record.pop("seconds", None)
+            assert cached == records
+
+    def test_stats_001(self, trees, monkeypatch, capsys):
+        plain = self.run(monkeypatch, capsys, "-r", *trees)
+        for jobs in ("1", "2"):
+            monkeypatch.setattr(sys, "argv", ["numdiff", "-r", "--stats", "-j", jobs])
+            sys.argv.extend(trees)
+            assert Main()() == plain[0]
+            out, err = capsys.readouterr()
+            assert out == plain[1]
+            assert "identical contents                      1" in err
+            assert "files compared                          3" in err
+            assert "slowest comparisons:" in err
+
+    def test_stats_002(self, tmp_path, monkeypatch, capsys):
+        file1, file2 = tmp_path / "a.txt", tmp_path / "b.txt"
+        file1.write_text("".join("x%d %d.0 a\n" % (i, i) for i in range(40)))
+        file2.write_text("".join("x%d %d.000001 a\n" % (i, i) for i in range(40)))
+        self.run(monkeypatch, capsys, str(file1), str(file2))
+        eq = CmpLine.__eq__
+        argv = ["numdiff", "-a", "1e-3", "--stats", str(file1), str(file2)]
+        monkeypatch.setattr(sys, "argv", argv)
+        assert Main()() == 0
+        assert CmpLine.__eq__ is not eq
+        err = capsys.readouterr().err
+        # One number in each line, the rows are checked vectorized if
+        # NumPy is available.
+        assert re.search(r"float parses +80\n", err)
+        if numdiff.cmpline._numpy() is not None:
+            assert re.search(r"vectorized row checks +40\n", err)
+        self.run(monkeypatch, capsys, str(file1), str(file2))
+        # The counting methods are gone without --stats.
+        assert CmpLine.__eq__ is eq
+
+    def test_compare_trees_001(self, trees, capsys):
+        for jobs in (1, 2):
+            results = compare_trees(*trees, jobs=jobs)
+            verdicts = {os.path.basename(i.file1): i.verdict for i in results}
+            assert verdicts == {
+                "same.txt": "equal",
+                "y.txt": "differ",
+                "z.txt": "only",
+                "w.txt": "only",
+                "x.txt": "differ",
+            }
+        assert capsys.readouterr().out == ""
+
+    def test_compare_files_001(self, trees, capsys):
+        file1, file2 = (os.path.join(i, "x.txt") for i in trees)
+        result = compare_files(file1, file2)
+        assert result.differ
+        assert result.hunks == [("replace", 1, 2, 1, 2)]
+        assert result.deviation.abs[0] == 1.0
+        assert "! 3 5" in result.diff
+        assert not compare_files(file1, file2, aeps=2.0).differ
+        assert capsys.readouterr().out == ""
+        with pytest.raises(TypeError):
+            compare_files(file1, file2, tolerance=2.0)
+
+    @pytest.mark.parametrize(
+        "options, error",
+        [
+            ({"max_hunks": 0}, ValueError),
+            ({"algorithm": "quick"}, ValueError),
+            ({"format": "jsonl", "verbose": True}, ValueError),
+            ({"aeps": "1e-3"}, TypeError),
+            ({"jobs": 1.5}, TypeError),
+        ],
+    )
+    def test_compare_files_003(self, trees, capsys, options, error):
+        # Bad options do not exit the program.
+        file1, file2 = (os.path.join(i, "x.txt") for i in trees)
+        with pytest.raises(error):
+            compare_files(file1, file2, **options)
+        with pytest.raises(error):
+            compare_trees(*trees, **options)
+        assert capsys.readouterr() == ("", "")
+
+    @pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="no named pipes")
+    def test_compare_files_002(self, tmp_path):
+        # Named pipes are not taken for identical by their sizes, and
+        # are read only once.
+        fifos = [str(tmp_path / i) for i in ("a", "b")]
+
+        def feed(fname, text):
+            with open(fname, "w") as fobj:
+                fobj.write(text)
+
+        for fname, text in zip(fifos, ("x 1\n", "x 2\n")):
+            os.mkfifo(fname)
+            threading.Thread(target=feed, args=(fname, text), daemon=True).start()
+        result = compare_files(*fifos)
+        assert result.differ
+        assert result.hunks == [("replace", 0, 1, 0, 1)]
+
+    def test_format_002(self, trees, monkeypatch, capsys):
+        result, out = self.run(monkeypatch, capsys, "-r", "--format", "junit", *trees)
+        assert result == 1
+        root = ElementTree.fromstring(out)
+        cases = root.findall("testcase")
+        assert len(cases) == 5
+        assert len(root.findall("testcase/failure")) == 4
+
+    def test_format_004(self, tmp_path, monkeypatch, capsys):
+        # Control characters are escaped for XML.
+        (tmp_path / "a.txt").write_text("x 1\x01\n")
+        (tmp_path / "b.txt").write_text("x 2\x01\n")
+        files = str(tmp_path / "a.txt"), str(tmp_path / "b.txt")
+        result, out = self.run(monkeypatch, capsys, "--format", "junit", *files)
+        assert result == 1
+        failure = ElementTree.fromstring(out).find("testcase/failure")
+        assert "x 1\\x01" in failure.text
+
+    def test_format_003(self, tmp_path, monkeypatch, capsys):
+        # Non-finite deviations are valid JSON.
+        (tmp_path / "a.txt").write_text("x 1e308\n")
+        (tmp_path / "b.txt").write_text("x -1e308\n")
+        files = str(tmp_path / "a.txt"), str(tmp_path / "b.txt")
+        result, out = self.run(monkeypatch, capsys, "--format", "jsonl", *files)
+        assert result == 1
+
+        def reject(name):
+            raise ValueError(name)
+
+        record = json.loads(out, parse_constant=reject)
+        assert record["deviation"]["abs"]["value"] == "inf"
+        with pytest.raises(SystemExit):
+            self.run(monkeypatch, capsys, "--format", "jsonl", "--verbose", *files)
+        assert "--verbose" in capsys.readouterr().err
+
+    def test_segments_001(self, tmp_path, monkeypatch):
+        lines1 = ["%d %.6f" % (i, i * 0.37) for i in range(400)]
+        lines2 = ["%d %.6f" % (i, i * 0.37) for i in range(400)]
+        for i in range(0, 400, 23):
+            lines2[i] = "%d %.12f" % (i, i * 0.37 + 1e-9)
+        lines2[100] = "100 2.0"
+        lines2.insert(250, "inserted")
+        del lines2[300:305]
+        (tmp_path / "a.txt").write_text("\n".join(lines1) + "\n")
+        (tmp_path / "b.txt").write_text("\n".join(lines2) + "\n")
+        files = str(tmp_path / "a.txt"), str(tmp_path / "b.txt")
+        monkeypatch.setattr(Main, "SEGMENTLINES", 20)
+        prog = Main()
+        prog.jobs = 2
+        spans = prog.segments(lines1, lines2, 0, 400, 0, 396)
+        # About four segments per job, covering both files.
+        assert len(spans) == 7
+        assert [i[:3:2] for i in spans[1:]] == [i[1::2] for i in spans[:-1]]
+        assert (spans[0][::2], spans[-1][1::2]) == ((0, 0), (400, 396))
+        parallel = compare_files(*files, jobs=2)
+        assert "! 100 2.0" in parallel.diff
+        self.check_alignment(lines1, lines2, parallel.hunks)
+
+    @staticmethod
+    def check_alignment(lines1, lines2, hunks):
+        """Check the lines between `hunks` are equal and paired one
+        to one, and all differing lines are in `hunks`."""
+        line = Main().comparator.line
+        i = j = 0
+        for _, i1, i2, j1, j2 in hunks + [(None, len(lines1), 0, len(lines2), 0)]:
+            assert i1 - i == j1 - j >= 0
+            for k in range(i1 - i):
+                assert line(lines1[i + k]) == line(lines2[j + k])
+            i, j = i2, j2
+
+    @staticmethod
+    def repeated(tmp_path, seed):
+        """Write two files with many repeated lines, differing at
+        random, return their lines and names."""
+        rand = random.Random(seed)
+        lines1 = [
+            rand.choice(["%d %.6f" % (i, i * 0.37), "----", "x 1.0"])
+            for i in range(300)
+        ]
+        lines2 = list(lines1)
+        for _ in range(15):
+            k = rand.randrange(len(lines2))
+            action = rand.random()
+            if action < 0.4:
+                lines2[k] = "%d %.6f" % (k, rand.random())
+            elif action < 0.7:
+                lines2.insert(k, rand.choice(["----", "new %d" % k, "x 1.0"]))
+            else:
+                del lines2[k : k + rand.randint(1, 4)]
+        (tmp_path / "a.txt").write_text("\n".join(lines1) + "\n")
+        (tmp_path / "b.txt").write_text("\n".join(lines2) + "\n")
+        return lines1, lines2, (str(tmp_path / "a.txt"), str(tmp_path / "b.txt"))
+
+    @pytest.mark.parametrize("seed", range(40))
+    def test_segments_002(self, tmp_path, monkeypatch, seed):
+        # Aligning segments in parallel gives a valid alignment, also
+        # with many repeated lines.
+        lines1, lines2, files = self.repeated(tmp_path, seed)
+        monkeypatch.setattr(Main, "SEGMENTLINES", 20)
+        serial = compare_files(*files)
+        parallel = compare_files(*files, jobs=2)
+        assert parallel.differ == serial.differ
+        self.check_alignment(lines1, lines2, parallel.hunks)
+
+    def test_segments_003(self, tmp_path, monkeypatch, capsys):
+        # Results cached by a parallel run are not used for a serial
+        # run, the alignment may differ.
+        files = self.repeated(tmp_path, 0)[2]
+        cache = str(tmp_path / "cache.db")
+        monkeypatch.setattr(Main, "SEGMENTLINES", 20)
+        serial = self.run(monkeypatch, capsys, *files)
+        parallel = self.run(monkeypatch, capsys, "-j", "2", "--cache", cache, *files)
+        assert parallel != serial
+        assert self.run(monkeypatch, capsys, "--cache", cache, *files) == serial
+        again = self.run(monkeypatch, capsys, "-j2", "--cache", cache, *files)
+        assert again == parallel
+
+    def test_compressed_001(self, trees, monkeypatch, capsys):
+        fname = os.path.join(trees[1], "x.txt")
+        with open(fname, "rb") as fobj:
+            data = fobj.read()
+        os.remove(fname)
+        with gzip.open(fname + ".gz", "wb") as fobj:
+            fobj.write(data)
+        pairs = [(i, j) for i, j, _, _ in Main().treepairs(*trees) if i and j]
+        assert ("x.txt", "x.txt.gz") in pairs
+        result, out = self.run(monkeypatch, capsys, "-r", *trees)
+        assert "--- %s.gz" % fname in out
+        assert "! 3 5" in out
+        result, out = self.run(
+            monkeypatch, capsys, os.path.join(trees[0], "x.txt"), trees[1]
+        )
+        assert result == 1
+        assert "! 3 5" in out
+
+    @pytest.fixture
+    def hunks(self, tmp_path):
+        lines1 = ["%d %.3f" % (i, i * 0.5) for i in range(40)]
+        lines2 = list(lines1)
+        lines2[5] = "5 7.0"
+        lines2[30] = "30 1.0"
+        (tmp_path / "h1.txt").write_text("\n".join(lines1) + "\n")
+        (tmp_path / "h2.txt").write_text("\n".join(lines2) + "\n")
+        return str(tmp_path / "h1.txt"), str(tmp_path / "h2.txt")
+
+    def test_brief_001(self, hunks, monkeypatch, capsys):
+        result, out = self.run(monkeypatch, capsys, "--brief", *hunks)
+        assert result == 1
+        assert out.endswith("Files %s and %s differ\n" % hunks)
+        result, out = self.run(monkeypatch, capsys, "--brief", hunks[0], hunks[0])
+        assert result == 0
+        assert "differ" not in out
+
+    def test_max_hunks_001(self, hunks, monkeypatch, capsys):
+        result, out = self.run(monkeypatch, capsys, "--max-hunks", "1", *hunks)
+        assert result == 1
+        assert "! 5 7.0" in out
+        assert "30 1.0" not in out
+        assert out.endswith("*** stopped after 1 differing hunks ***\n")
+        result, out = self.run(monkeypatch, capsys, "--max-hunks", "2", *hunks)
+        assert "30 1.0" in out
+        assert "stopped" not in out
+
+    def test_max_hunks_003(self, hunks, monkeypatch, capsys):
+        for count in ("1", "2"):
+            argv = ("--max-hunks", count) + hunks
+            expected = self.run(monkeypatch, capsys, *argv)
+            assert self.run(monkeypatch, capsys, "--stream", *argv) == expected
+        assert "stopped" not in expected[1]
+
+    def test_brief_002(self, tmp_path, monkeypatch, capsys):
+        lines1 = ["%d %.3f" % (i, i * 0.5) for i in range(3000)]
+        lines2 = ["%d %.9f" % (i, i * 0.5 + 1e-9) for i in range(3000)]
+        files = str(tmp_path / "a.txt"), str(tmp_path / "b.txt")
+        (tmp_path / "a.txt").write_text("\n".join(lines1) + "\n")
+        (tmp_path / "b.txt").write_text("\n".join(lines2) + "\n")
+        assert self.run(monkeypatch, capsys, "--brief", *files)[0] == 0
+        # Numerically differing line pairs are found without aligning
+        # the lines.
+        lines2[2500] = "2500 7.0"
+        (tmp_path / "b.txt").write_text("\n".join(lines2) + "\n")
+        monkeypatch.setattr(Main, "align", None)
+        assert self.run(monkeypatch, capsys, "--brief", *files)[0] == 1
+
+    def test_summary_001(self, hunks, monkeypatch, capsys):
+        result, out = self.run(monkeypatch, capsys, "--summary", *hunks)
+        assert result == 1
+        assert "! 5 7.0" in out
+        assert out.endswith(
+            "numerical deviations: 2 numbers differ\n"
+            "  largest absolute 14 in lines 31/31, column 2\n"
+            "  largest relative 14 in lines 31/31, column 2\n"
+            "  relative deviations per column:\n"
+            "  column  <1e-12   <1e-9   <1e-6   <1e-3      <1     >=1\n"
+            "       2       0       0       0       0       1       1\n"
         )
+        result, out = self.run(monkeypatch, capsys, "-q", "--summary", *hunks)
+        assert "Files %s and %s differ\nnumerical deviations" % hunks in out
+        result, out = self.run(
+            monkeypatch, capsys, "--summary", "--format", "jsonl", *hunks
+        )
+        record = json.loads(out)
+        assert record["deviation"]["count"] == 2
+        assert record["deviation"]["histogram"] == {"1": [0, 0, 0, 0, 1, 1]}
+        result, out = self.run(
+            monkeypatch, capsys, "--summary", "--format", "junit", *hunks
+        )
+        assert "numerical deviations: 2 numbers differ" in out
+
+    def test_max_hunks_002(self, hunks, monkeypatch, capsys):
+        with pytest.raises(SystemExit):
+            self.run(monkeypatch, capsys, "--max-hunks", "0", *hunks)
+        assert "--max-hunks must be at least 1" in capsys.readouterr().err
 
 
 True
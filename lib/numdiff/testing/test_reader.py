@@ -0,0 +1,193 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Testing the numdiff.reader module.
+"""
+
+# Standard libraries.
+import codecs
+import gzip
+import lzma
+import io
+import os
+import re
+import sys
+import threading
+import time
+import types
+
+# Third party libraries.
+import pytest
+# DNV GL libraries.
+from numdiff import CFile
+from numdiff.reader import MappedFile, Prefetcher, compression
+
+__date__ = "2026/10/18 10:00:00 hoel"
+__author__ = "Berthold Höllmann"
+__copyright__ = "Copyright © 2026 by DNV GL SE"
+__credits__ = ["Berthold Höllmann"]
+__maintainer__ = "Berthold Höllmann"
+__email__ = "berthold.hoellmann@dnvgl.com"
+
+
+DATA = (
+    b"# comment\n"
+    b"a  1.0\t2\r\n"
+    b"b\r3 \x0c 4\n"
+    b"  REV 17\n"
+    b"\x1fc \x1f6\x1f\n"
+    b"\xc3\xa4 \xc3\xb6  5\n"
+    b"bad \xff byte\n"
+    b"\n"
+    b"last"
+)
+
+
+def reference(fname, cchars, ignore, ignore_space):
+    """Lines as read by `CFile` from a `codecs` stream."""
+    search = re.compile(ignore).search if ignore else (lambda x: None)
+
+    def iscomment(line):
+        return (bool(cchars) and line.startswith(cchars)) or search(line)
+
+    with codecs.open(fname, "r", encoding="utf-8", errors="replace") as fobj:
+        return [i.strip() for i in CFile(fobj, iscomment, ignore_space)]
+
+
+class TestMappedFile(object):
+    @pytest.mark.parametrize("cchars", [None, "#"])
+    @pytest.mark.parametrize(
+        "ignore",
+        [
+            "",
+            "REV",
+            "ä",
+            r"\u00e4",
+            r"\N{LATIN SMALL LETTER O WITH DIAERESIS}",
+            r"(?u)\bREV",
+            r"(?i)rev\s",
+            r"^\w\s+\d",
+        ],
+    )
+    @pytest.mark.parametrize("ignore_space", [False, True])
+    def test_lines_001(self, tmp_path, cchars, ignore, ignore_space):
+        fname = tmp_path / "data.txt"
+        fname.write_bytes(DATA)
+        assert list(MappedFile(str(fname), cchars, ignore, ignore_space)) == (
+            reference(str(fname), cchars, ignore, ignore_space)
+        )
+
+    def test_empty_001(self, tmp_path):
+        fname = tmp_path / "empty.txt"
+        fname.write_bytes(b"")
+        assert list(MappedFile(str(fname))) == []
+
+    @pytest.mark.parametrize("kind", ["gzip", "xz", "zstd"])
+    def test_compressed_001(self, tmp_path, kind):
+        if kind == "gzip":
+            data = gzip.compress(DATA)
+        elif kind == "xz":
+            data = lzma.compress(DATA)
+        else:
+            data = pytest.importorskip("zstandard").ZstdCompressor().compress(DATA)
+        # Recognized by the contents, not by the name.
+        fname = tmp_path / "data.txt"
+        fname.write_bytes(data)
+        plain = tmp_path / "plain.txt"
+        plain.write_bytes(DATA)
+        assert compression(str(fname)) == kind
+        assert compression(str(plain)) is None
+        assert list(MappedFile(str(fname), "#", "REV", True)) == (
+            reference(str(plain), "#", "REV", True)
+        )
+
+
+    @pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="no named pipes")
+    @pytest.mark.parametrize("compress", [False, True])
+    def test_pipe_001(self, tmp_path, compress):
+        # The first bytes arriving one by one are enough to recognize
+        # the compression, and are not lost.
+        fname = tmp_path / "pipe"
+        os.mkfifo(str(fname))
+        data = gzip.compress(DATA) if compress else DATA
+
+        def feed():
+            with open(str(fname), "wb", buffering=0) as fobj:
+                for i in range(8):
+                    fobj.write(data[i : i + 1])
+                    time.sleep(0.01)
+                fobj.write(data[8:])
+
+        thread = threading.Thread(target=feed, daemon=True)
+        thread.start()
+        plain = tmp_path / "plain.txt"
+        plain.write_bytes(DATA)
+        assert list(MappedFile(str(fname), "#")) == (
+            reference(str(plain), "#", None, False)
+        )
+        thread.join()
+
+    @staticmethod
+    def fakezstd(fobj):
+        """Stand-in for the zstd decompressors, the data is the magic
+        number followed by the plain text."""
+        return io.BytesIO(fobj.read()[4:])
+
+    @pytest.mark.parametrize("module", ["compression", "zstandard", None])
+    def test_zstd_001(self, tmp_path, monkeypatch, module):
+        fname = tmp_path / "data.txt"
+        fname.write_bytes(b"\x28\xb5\x2f\xfd" + DATA)
+        plain = tmp_path / "plain.txt"
+        plain.write_bytes(DATA)
+        for name in ("compression", "compression.zstd", "zstandard"):
+            monkeypatch.setitem(sys.modules, name, None)
+        if module == "compression":
+            zstd = types.SimpleNamespace(ZstdFile=self.fakezstd)
+            monkeypatch.setitem(
+                sys.modules, "compression", types.SimpleNamespace(zstd=zstd)
+            )
+            monkeypatch.setitem(sys.modules, "compression.zstd", zstd)
+        elif module == "zstandard":
+            decompressor = types.SimpleNamespace(
+                stream_reader=lambda fobj, read_across_frames: self.fakezstd(fobj)
+            )
+            monkeypatch.setitem(
+                sys.modules,
+                "zstandard",
+                types.SimpleNamespace(ZstdDecompressor=lambda: decompressor),
+            )
+        else:
+            with pytest.raises(OSError, match="zstandard"):
+                list(MappedFile(str(fname)))
+            return
+        assert compression(str(fname)) == "zstd"
+        assert list(MappedFile(str(fname), "#")) == (
+            reference(str(plain), "#", None, False)
+        )
+
+
+class TestPrefetcher(object):
+    def test_prefetch_001(self, tmp_path):
+        fname = tmp_path / "data.txt"
+        fname.write_bytes(DATA * 1000)
+        prefetch = Prefetcher(bufsize=1000)
+        prefetch(str(fname), str(fname))
+        prefetch.join()
+        assert len(prefetch.recent) == 1
+
+    @pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="no named pipes")
+    def test_prefetch_002(self, tmp_path):
+        # Pipes are left alone, opening one would block.
+        fname = tmp_path / "pipe"
+        os.mkfifo(str(fname))
+        prefetch = Prefetcher()
+        prefetch(str(fname), str(tmp_path / "missing"))
+        prefetch.join()
+        assert len(prefetch.recent) == 0
+
+
+# Local Variables:
+# mode: python
+# compile-command: "python ../../../setup.py test"
+# time-stamp-pattern: "30/__date__ = \"%:y/%02m/%02d %02H:%02M:%02S %u\""
+# End:
@@ -0,0 +1,194 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Testing the numdiff.server module.
+"""
+
+# Standard libraries.
+import os
+import socket
+import stat
+import subprocess
+import sys
+import time
+
+# Third party libraries.
+import pytest
+# DNV GL libraries.
+import numdiff
+from numdiff import Main, server
+
+__date__ = "2026/10/18 16:00:00 hoel"
+__author__ = "Berthold Höllmann"
+__copyright__ = "Copyright © 2026 by DNV GL SE"
+__credits__ = ["Berthold Höllmann"]
+__maintainer__ = "Berthold Höllmann"
+__email__ = "berthold.hoellmann@dnvgl.com"
+
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(socket, "AF_UNIX"), reason="no Unix domain sockets"
+)
+
+
+class TestServer(object):
+    @pytest.fixture
+    def files(self, tmp_path):
+        (tmp_path / "a.txt").write_text("x 1.0\ny 2.0\nz 3.0\n")
+        (tmp_path / "b.txt").write_text("x 1.0\ny 2.5\nz 3.0\n")
+        return str(tmp_path / "a.txt"), str(tmp_path / "b.txt")
+
+    @staticmethod
+    def env():
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(
+            [os.path.dirname(os.path.dirname(numdiff.__file__))]
+            + [i for i in [env.get("PYTHONPATH")] if i]
+        )
+        return env
+
+    @pytest.fixture
+    def serve(self, tmp_path):
+        path = str(tmp_path / "numdiff.sock")
+        proc = subprocess.Popen(
+            [
+                sys.executable,
+                "-c",
+                "import sys; from numdiff import main; main(sys.argv[1:])",
+                "--serve",
+                "--socket",
+                path,
+            ],
+            env=self.env(),
+        )
+        try:
+            for _ in range(200):
+                if os.path.exists(path):
+                    break
+                time.sleep(0.05)
+            else:
+                pytest.fail("server did not start")
+            yield path
+        finally:
+            proc.terminate()
+            proc.wait(10)
+        assert not os.path.exists(path)
+
+    def local(self, capsys, *argv):
+        try:
+            status = Main()(list(argv))
+        except SystemExit as exc:
+            status = exc.code
+        out = capsys.readouterr()
+        return status, out.out, out.err
+
+    def test_forward_001(self, tmp_path):
+        assert server.forward(["a", "b"], str(tmp_path / "missing.sock")) is None
+
+    def test_forward_002(self, files):
+        assert server.forward(list(files), "") is None
+
+    def test_forward_003(self, serve, files, capsys):
+        status = server.forward(list(files), serve)
+        out = capsys.readouterr()
+        assert (status, out.out, out.err) == self.local(capsys, *files)
+        assert status == 1
+        assert "y 2.5" in out.out
+
+    def test_forward_004(self, serve, files, capsys):
+        status = server.forward(["--brief"] + list(files), serve)
+        assert status == 1
+        assert capsys.readouterr().out.endswith("Files %s and %s differ\n" % files)
+        status = server.forward([files[0], files[0]], serve)
+        assert status == 0
+        assert "differ" not in capsys.readouterr().out
+
+    def test_forward_005(self, serve, files, capsys):
+        status = server.forward(["--no-such-option"] + list(files), serve)
+        assert status == 2
+        assert "--no-such-option" in capsys.readouterr().err
+
+    def test_forward_006(self, tmp_path, files):
+        # Sockets others may access are not taken for the user's server.
+        path = str(tmp_path / "open.sock")
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.bind(path)
+            sock.listen(1)
+            os.chmod(path, 0o660)
+            assert server.forward(list(files), path) is None
+        finally:
+            sock.close()
+
+    def test_forward_007(self, serve, files, capsys):
+        assert stat.S_IMODE(os.stat(serve).st_mode) == 0o600
+        for data in (b"{", b"[]", b'{"argv": "x", "cwd": "."}', b"\xff"):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            with sock:
+                sock.connect(serve)
+                server._send(sock, b"a", data)
+                assert server._recv(sock.makefile("rb")) == (b"r", b"")
+        # Still serving.
+        assert server.forward(list(files), serve) == 1
+        assert "y 2.5" in capsys.readouterr().out
+
+    def test_forward_008(self, serve, files, tmp_path, monkeypatch):
+        # Files of the client process are not opened by the server.
+        with open(files[1]) as fobj:
+            fname = "/dev/fd/%d" % fobj.fileno()
+            assert Main()([files[0], fname]) == 1
+            assert server.forward([files[0], fname], serve) is None
+        assert server.forward(["/dev/stdin", files[1]], serve) is None
+        monkeypatch.chdir(tmp_path)
+        assert server.forward(["../" * 10 + "proc/self/fd/0", "a.txt"], serve) is None
+        assert server.forward(["a.txt", "b.txt"], serve) == 1
+
+    def test_socketpath_001(self, monkeypatch):
+        monkeypatch.delenv("NUMDIFF_SOCKET", raising=False)
+        monkeypatch.setenv("XDG_RUNTIME_DIR", "/run/user/1")
+        assert server.socketpath() == "/run/user/1/numdiff.sock"
+        assert server.socketpath("x.sock") == "x.sock"
+        monkeypatch.delenv("XDG_RUNTIME_DIR")
+        monkeypatch.setenv("TMPDIR", "/scratch")
+        assert server.socketpath() == "/scratch/numdiff-%d/numdiff.sock" % os.getuid()
+
+    def test_serve_001(self, tmp_path):
+        # The socket's directory is created accessible by the user only.
+        path = str(tmp_path / "new" / "numdiff.sock")
+        proc = subprocess.Popen(
+            [
+                sys.executable,
+                "-c",
+                "import sys; from numdiff import main; main(sys.argv[1:])",
+                "--serve",
+                "--socket",
+                path,
+            ],
+            env=self.env(),
+        )
+        try:
+            for _ in range(200):
+                if os.path.exists(path):
+                    break
+                time.sleep(0.05)
+            assert stat.S_IMODE(os.stat(str(tmp_path / "new")).st_mode) == 0o700
+        finally:
+            proc.terminate()
+            assert proc.wait(10) == 0
+        assert not os.path.exists(path)
+
+    def test_run_001(self, monkeypatch):
+        # Shutting down passes by the handling of single requests.
+        def shutdown(self, argv):
+            raise server._Shutdown()
+
+        monkeypatch.setattr(Main, "__call__", shutdown)
+        with pytest.raises(server._Shutdown):
+            server.Server.run(["a", "b"])
+
+
+# Local Variables:
+# mode: python
+# compile-command: "python ../../../setup.py test"
+# time-stamp-pattern: "30/__date__ = \"%:y/%02m/%02d %02H:%02M:%02S %u\""
+# End:
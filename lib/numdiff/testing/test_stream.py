@@ -0,0 +1,70 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Testing the numdiff.stream module.
+"""
+
+# Standard libraries.
+import difflib
+import random
+
+# Third party libraries.
+import pytest
+# DNV GL libraries.
+from numdiff.stream import LineBuffer, StreamDiff
+
+__date__ = "2026/10/18 09:00:00 hoel"
+__author__ = "Berthold Höllmann"
+__copyright__ = "Copyright © 2026 by DNV GL SE"
+__credits__ = ["Berthold Höllmann"]
+__maintainer__ = "Berthold Höllmann"
+__email__ = "berthold.hoellmann@dnvgl.com"
+
+
+def align(a, b):
+    return difflib.SequenceMatcher(None, a, b, autojunk=False).get_opcodes()
+
+
+class TestLineBuffer(object):
+    def test_fill_001(self):
+        a = LineBuffer("abc")
+        a.fill(2)
+        assert not a.eof
+        a.fill(5)
+        assert a.eof
+        assert a[0:5] == ["a", "b", "c"]
+
+    def test_discard_001(self):
+        a = LineBuffer("abcdef")
+        a.fill(6)
+        a.discard(4)
+        assert a[4:6] == ["e", "f"]
+        with pytest.raises(IndexError):
+            a[3:5]
+
+
+class TestStreamDiff(object):
+    @pytest.mark.parametrize("seed", range(10))
+    @pytest.mark.parametrize("n", [0, 1, 3])
+    def test_groups_001(self, seed, n):
+        rnd = random.Random(seed)
+        a = ["%d" % i for i in range(300)]
+        b = [rnd.choice((i, i, i, i, i, i, i, i, "x")) for i in a]
+        del b[rnd.randrange(300)]
+        ref = difflib.SequenceMatcher(None, a, b, autojunk=False)
+        diff = StreamDiff(a, b, align, n=n, window=50)
+        assert list(diff.groups()) == list(ref.get_grouped_opcodes(n))
+
+    def test_groups_002(self):
+        assert list(StreamDiff([], [], align).groups()) == []
+        assert list(StreamDiff("ab", "ab", align).groups()) == []
+        assert list(StreamDiff("", "ab", align).groups()) == [
+            [("insert", 0, 0, 0, 2)]
+        ]
+
+
+# Local Variables:
+# mode: python
+# compile-command: "python ../../../setup.py test"
+# time-stamp-pattern: "30/__date__ = \"%:y/%02m/%02d %02H:%02M:%02S %u\""
+# End:
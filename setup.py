@@ -26,6 +26,9 @@ if __name__ == '__main__':
           license='Other/Proprietary License',
           package_dir={'': 'lib'},
           packages=['numdiff'],
+          extras_require={
+              'numpy': ['numpy'],
+              'zstd': ['zstandard']},
           entry_points={
               'console_scripts': [
                   'numdiff = numdiff:main']},
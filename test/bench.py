@@ -0,0 +1,383 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Performance benchmarks for numdiff.
+
+Synthetic input files are generated from a fixed random seed, so runs
+with the same parameters see the same workload. For each benchmark the
+throughput in lines per second, the best wall clock time of several
+repetitions, and the peak memory allocated by Python are measured. The
+results of each run are appended as one JSON record to the output
+file, `--compare` shows the changes against an earlier run.
+"""
+
+# Standard libraries.
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# DNV GL libraries.
+import numdiff
+from numdiff.cmpline import CmpLine
+
+__date__ = "2026/10/18 14:00:00 hoel"
+__author__ = "Berthold Höllmann"
+__copyright__ = "Copyright © 2026 by DNV GL SE"
+__credits__ = ["Berthold Höllmann"]
+__maintainer__ = "Berthold Höllmann"
+__email__ = "berthold.hoellmann@dnvgl.com"
+
+
+__all__ = [
+    "Perturb",
+    "float_table",
+    "nastran_cards",
+    "comma_table",
+    "matlab_dump",
+    "tree",
+    "measure",
+    "BENCHMARKS",
+    "main",
+]
+
+
+class Perturb(object):
+    """Change numbers with probability `rate`. Half of the changes
+    stay within the default tolerances, the other half do not.
+
+    >>> perturb = Perturb(0, seed=1)
+    >>> perturb(1.5)
+    1.5
+    >>> perturb = Perturb(1, seed=1)
+    >>> [perturb(1.5) != 1.5 for i in range(3)]
+    [True, True, True]"""
+
+    def __init__(self, rate, seed=0):
+        self.rate = rate
+        self.random = random.Random(seed)
+
+    def __call__(self, value):
+        if self.random.random() >= self.rate:
+            return value
+        if self.random.random() < 0.5:
+            return value * (1 + 1e-7)
+        return value * 1.01 + 1
+
+
+def _pair(base, make):
+    """Write the files `base`1.txt and `base`2.txt with the lines from
+    `make(perturb)`, unchanged and perturbed, return their names."""
+    names = (base + "1.txt", base + "2.txt")
+    for name, rate in zip(names, (0, make.rate)):
+        with open(name, "w") as out:
+            for line in make(Perturb(rate, make.seed)):
+                out.write(line + "\n")
+    return names
+
+
+class _Workload(object):
+    """Generator for the lines of one kind of input."""
+
+    def __init__(self, lines, rate, seed=0):
+        self.lines = lines
+        self.rate = rate
+        self.seed = seed
+
+    def __call__(self, perturb):
+        values = random.Random(self.seed)
+        for i in range(self.lines):
+            yield self.line(i, values, perturb)
+
+
+class _FloatTable(_Workload):
+    def line(self, i, values, perturb):
+        return " ".join(
+            "%.12g" % perturb(values.uniform(-1e3, 1e3)) for _ in range(6)
+        )
+
+
+class _NastranCards(_Workload):
+    def line(self, i, values, perturb):
+        if i % 2:
+            return "*       %16.8g%16.8g" % (
+                perturb(values.uniform(-10, 10)),
+                perturb(values.uniform(-10, 10)),
+            )
+        return "GRID*   %16d%16s%16.9g%16.8g" % (
+            i // 2 + 1,
+            "",
+            perturb(values.uniform(-10, 10)),
+            perturb(values.uniform(-10, 10)),
+        )
+
+
+class _CommaTable(_Workload):
+    def line(self, i, values, perturb):
+        return "N, %7d, %12.4f, %12.4f, %12.4f" % (
+            (i + 1,) + tuple(perturb(values.uniform(-100, 100)) for _ in range(3))
+        )
+
+
+class _MatlabDump(_Workload):
+    def line(self, i, values, perturb):
+        if i < 6:
+            return "  MATLAB banner line %d" % i
+        if i % 4 == 2:
+            return ">> ans ="
+        return "   %10.4f   %10.4f   %10.4f" % tuple(
+            perturb(values.uniform(-1, 1)) for _ in range(3)
+        )
+
+
+def float_table(base, lines, rate, seed=0):
+    """Write a pair of white space separated float tables."""
+    return _pair(base, _FloatTable(lines, rate, seed))
+
+
+def nastran_cards(base, lines, rate, seed=0):
+    """Write a pair of NASTRAN bulk data files with large field
+    `GRID*` cards, to be compared with `--fixcols=8,24,40,56,72,80`."""
+    return _pair(base, _NastranCards(lines, rate, seed))
+
+
+def comma_table(base, lines, rate, seed=0):
+    """Write a pair of comma separated tables."""
+    return _pair(base, _CommaTable(lines, rate, seed))
+
+
+def matlab_dump(base, lines, rate, seed=0):
+    """Write a pair of MATLAB session dumps."""
+    return _pair(base, _MatlabDump(lines, rate, seed))
+
+
+def tree(top, depth, width, files, lines, rate, seed=0):
+    """Create two directory trees below `top` with `width`
+    subdirectories per level up to `depth` levels and `files` float
+    tables in each directory, return the names of the tree roots."""
+    roots = [os.path.join(top, "tree1"), os.path.join(top, "tree2")]
+    dirs = [""]
+    for level in range(depth):
+        dirs += [
+            os.path.join(i, "d%d" % j)
+            for i in dirs
+            if i.count(os.sep) + bool(i) == level
+            for j in range(width)
+        ]
+    for num, path in enumerate(dirs):
+        for i in range(files):
+            base = os.path.join(top, "f")
+            names = float_table(base, lines, rate, seed + num * files + i)
+            for root, name in zip(roots, names):
+                os.makedirs(os.path.join(root, path), exist_ok=True)
+                os.rename(name, os.path.join(root, path, "data%d.txt" % i))
+    return roots
+
+
+def measure(func, repeat=3):
+    """Run `func` `repeat` times, return the best wall clock time in
+    seconds and the peak memory allocated in bytes, measured in an
+    additional run."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+def _run(*argv):
+    """Run numdiff with command line arguments `argv`, discarding the
+    output."""
+    args = sys.argv
+    sys.argv = ["numdiff"] + list(argv)
+    try:
+        with open(os.devnull, "w") as out, contextlib.redirect_stdout(out):
+            numdiff.Main()()
+    finally:
+        sys.argv = args
+
+
+def _count(*names):
+    """Return the number of lines in the files `names`."""
+    result = 0
+    for name in names:
+        with open(name, "rb") as fobj:
+            result += sum(1 for _ in fobj)
+    return result
+
+
+def bench_cmpline(work, size, rate):
+    """`CmpLine` comparison of the lines of two float tables."""
+    names = float_table(os.path.join(work, "cmpline"), size, rate)
+    lines = []
+    for name in names:
+        with open(name) as fobj:
+            lines.append(fobj.read().splitlines())
+    options = dict(
+        cchars=None,
+        aeps=1e-8,
+        reps=1e-5,
+        ignore_space=False,
+        splitre=None,
+        mlab=False,
+        verbose=False,
+        fixcols=None,
+    )
+
+    def func():
+        for line1, line2 in zip(*lines):
+            CmpLine(line1, options) == CmpLine(line2, options)
+
+    return func, 2 * size
+
+
+def _docheck(generate, *options):
+    def bench(work, size, rate):
+        names = generate(os.path.join(work, generate.__name__), size, rate)
+        return (lambda: _run(*(options + names))), _count(*names)
+
+    bench.__doc__ = "`docheck` on a pair of files from `%s`." % generate.__name__
+    return bench
+
+
+def bench_deepcheck(work, size, rate):
+    """`deepcheck` on two directory trees of float tables."""
+    roots = tree(work, 3, 3, 2, max(size // 80, 1), rate)
+    lines = sum(
+        _count(*[os.path.join(i, j) for j in names])
+        for i, _, names in os.walk(roots[0])
+    )
+    return (lambda: _run("-r", *roots)), 2 * lines
+
+
+# Available benchmarks by name.
+BENCHMARKS = {
+    "cmpline": bench_cmpline,
+    "docheck_table": _docheck(float_table),
+    "docheck_nastran": _docheck(nastran_cards, "--fixcols=8,24,40,56,72,80"),
+    "docheck_comma": _docheck(comma_table),
+    "docheck_matlab": _docheck(matlab_dump, "--matlab"),
+    "deepcheck": bench_deepcheck,
+}
+
+
+def compare(old, new):
+    """Print the changes of the results in run `new` against run
+    `old`."""
+    print("%-16s %12s %12s %8s" % ("benchmark", "old lines/s", "new lines/s", "ratio"))
+    for name, result in sorted(new["results"].items()):
+        if name not in old["results"]:
+            continue
+        before = old["results"][name]["lines_per_second"]
+        after = result["lines_per_second"]
+        print("%-16s %12.0f %12.0f %8.2f" % (name, before, after, after / before))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument(
+        "benchmarks",
+        nargs="*",
+        metavar="BENCHMARK",
+        help="""Benchmarks to run, one of %s. Default: all"""
+        % ", ".join(sorted(BENCHMARKS)),
+    )
+    parser.add_argument(
+        "--size",
+        type=int,
+        default=20000,
+        help="""Number of lines in each generated file.
+                Default: %(default)d""",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=0.01,
+        help="""Probability of a number being changed in the second
+                file. Default: %(default)g""",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="""Number of timed repetitions. Default: %(default)d""",
+    )
+    parser.add_argument(
+        "--output",
+        default="bench.jsonl",
+        metavar="FILE",
+        help="""Append the results to FILE. Default: %(default)s""",
+    )
+    parser.add_argument(
+        "--compare",
+        metavar="FILE",
+        default=None,
+        help="""Compare the results against the last run stored in
+                FILE, if it exists.""",
+    )
+    args = parser.parse_args(argv)
+
+    for name in args.benchmarks:
+        if name not in BENCHMARKS:
+            parser.error("unknown benchmark '%s'" % name)
+
+    record = dict(
+        date=datetime.datetime.now().isoformat(timespec="seconds"),
+        python=platform.python_version(),
+        machine=platform.machine(),
+        size=args.size,
+        rate=args.rate,
+        results={},
+    )
+    work = tempfile.mkdtemp(prefix="numdiff-bench-")
+    try:
+        for name in args.benchmarks or sorted(BENCHMARKS):
+            func, lines = BENCHMARKS[name](work, args.size, args.rate)
+            seconds, peak = measure(func, args.repeat)
+            record["results"][name] = dict(
+                lines=lines,
+                seconds=seconds,
+                lines_per_second=lines / seconds,
+                peak_memory=peak,
+            )
+            print(
+                "%-16s %9d lines %9.3f s %12.0f lines/s %9.1f MiB"
+                % (name, lines, seconds, lines / seconds, peak / 2.0 ** 20)
+            )
+    finally:
+        shutil.rmtree(work)
+
+    if args.compare and os.path.exists(args.compare):
+        with open(args.compare) as fobj:
+            old = [json.loads(i) for i in fobj if i.strip()]
+        if old:
+            compare(old[-1], record)
+    with open(args.output, "a") as out:
+        out.write(json.dumps(record) + "\n")
+
+
+if __name__ == "__main__":
+    main()
+
+
+# Local Variables:
+# mode: python
+# compile-command: "python bench.py --size 2000"
+# time-stamp-pattern: "30/__date__ = \"%:y/%02m/%02d %02H:%02M:%02S %u\""
+# End:
@@ -14,7 +14,9 @@ import unittest
 
 # DNV GL libraries.
 import numdiff
-from numdiff import files, cmpline, difflist
+from numdiff import (
+    files, cmpline, difflist, stream, deviation, report, stats, reader,
+    align)
 
 __date__ = "2019/03/25 14:15:41 berhol"
 __author__ = "Berthold Höllmann"
@@ -57,6 +59,12 @@ def load_tests(loader, tests, ignore):
     tests.addTests(doctest.DocTestSuite(cmpline))
     tests.addTests(doctest.DocTestSuite(difflist))
     tests.addTests(doctest.DocTestSuite(files))
+    tests.addTests(doctest.DocTestSuite(stream))
+    tests.addTests(doctest.DocTestSuite(deviation))
+    tests.addTests(doctest.DocTestSuite(report))
+    tests.addTests(doctest.DocTestSuite(stats))
+    tests.addTests(doctest.DocTestSuite(reader))
+    tests.addTests(doctest.DocTestSuite(align))
     return tests
 
 